@@ -2,141 +2,332 @@
 AUTO SCHEDULER - The Brain of Smart Attendance System
 =====================================================
 This script runs continuously and automatically:
-- Checks if there's a class scheduled RIGHT NOW
-- Starts face recognition when class begins
-- Stops it when class ends
+- Loads today's timetable once into a sorted day plan
+- Sleeps until the next class start/end and acts exactly on time
+- Keeps one warm recognition worker per room (recognition_worker.py),
+  pre-started for every room with classes today, so models are already
+  loaded when a period begins
+- Sends each worker "start session" / "stop session" commands for the
+  class running in its room, on that room's camera (classes.camera_source)
+- Health-checks the workers and restarts any that crash
+- Reloads the plan only when the timetable changes (or the day rolls over)
 - Works completely hands-free!
 
 Run this script during college hours:
     python auto_scheduler.py
 """
 
-import sqlite3
 import subprocess
 import time
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 
-# Database path
-DB_PATH = "database.db"
+import database
+from recognition_worker import AUTHKEY_ENV, BASE_PORT, WorkerClient, new_authkey
 
-# Track running state
-running_process = None
-current_session = None
+# While sleeping until the next boundary, check this often for timetable
+# edits and crashed workers
+CHANGE_POLL_SECONDS = 5
+
+# A crashed session is restarted at most this many times per class
+MAX_RESTARTS = 3
+
+# CPU threads shared by the workers; each gets an equal slice per room
+# running at the same time (see threads_per_worker)
+CPU_THREADS = os.cpu_count() or 1
+worker_threads = CPU_THREADS
+
+# Seconds to wait for a cold worker to load its models
+WORKER_START_TIMEOUT = 300
+
+# Fresh per scheduler run: only this process and its workers can send commands
+WORKER_KEY, WORKER_KEY_HEX = new_authkey()
+
+# Warm workers: camera_source -> {"process", "client"}
+room_workers = {}
+# Running sessions: slot_id -> {"camera", "slot", "restarts"}
+workers = {}
+started_today = set()
 
 def log(message):
     """Print with timestamp"""
     timestamp = datetime.now().strftime("%H:%M:%S")
     print(f"[{timestamp}] {message}")
 
-def get_current_slot():
-    """Check if there's a class scheduled right now"""
-    now = datetime.now()
+def load_day_plan(conn, now):
+    """Return today's slots as a list of (start, end, slot_info) sorted by start"""
     day = now.strftime("%A")  # Monday, Tuesday, etc.
-    current_time = now.strftime("%H:%M")
     
-    conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
-    
     cursor.execute("""
-        SELECT timetable.id, timetable.subject_id, subjects.subject_name, classes.class_name, 
+        SELECT timetable.id, timetable.subject_id, timetable.class_id, subjects.subject_name, classes.class_name, 
+               COALESCE(classes.camera_source, '0') as camera_source,
                users.name as teacher, timetable.start_time, timetable.end_time
         FROM timetable
         JOIN subjects ON timetable.subject_id = subjects.id
         JOIN classes ON timetable.class_id = classes.id
         JOIN users ON timetable.teacher_id = users.id
-        WHERE timetable.day = ? 
-          AND timetable.start_time <= ? 
-          AND timetable.end_time > ?
-    """, (day, current_time, current_time))
+        WHERE timetable.day = ?
+        ORDER BY timetable.start_time, timetable.end_time
+    """, (day,))
     
-    slot = cursor.fetchone()
-    conn.close()
+    plan = []
+    for slot in cursor.fetchall():
+        start_time, end_time = slot[-2], slot[-1]
+        try:
+            start = datetime.combine(now.date(), datetime.strptime(start_time, "%H:%M").time())
+            end = datetime.combine(now.date(), datetime.strptime(end_time, "%H:%M").time())
+        except (TypeError, ValueError):
+            log(f"Skipping slot {slot[0]}: bad time '{start_time}' - '{end_time}'")
+            continue
+        plan.append((start, end, slot))
     
-    return slot
+    plan.sort(key=lambda entry: (entry[0], entry[1]))
+    return plan
 
-def start_session(slot_info):
-    """Start the face recognition camera"""
-    global running_process
+def threads_per_worker(plan):
+    """Equal slice of CPU_THREADS for the most rooms that hold a class at once today"""
+    rooms = 1
+    for start, end, slot in plan:
+        rooms = max(rooms, len({s[5] for s_start, s_end, s in plan if s_start <= start < s_end}))
+    return max(1, CPU_THREADS // rooms)
+
+def get_active_slots(plan, now):
+    """Return every slot scheduled right now (one per room) from the day plan"""
+    return [slot for start, end, slot in plan if start <= now < end]
+
+def next_boundary(plan, now):
+    """Next class start or end after now; midnight if nothing is left today"""
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    upcoming = [t for start, end, _ in plan for t in (start, end) if t > now]
+    return min(upcoming + [midnight])
+
+def wait_until(conn, wake, plan_version):
+    """
+    Sleep until wake. Every CHANGE_POLL_SECONDS health-check the workers,
+    then check PRAGMA data_version (free, no disk read) and only then the
+    timetable change counter. Returns True if the timetable changed before wake.
+    """
+    data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+    while True:
+        remaining = (wake - datetime.now()).total_seconds()
+        if remaining <= 0:
+            return False
+        time.sleep(min(remaining, CHANGE_POLL_SECONDS))
+        check_workers()
+        
+        latest = conn.execute("PRAGMA data_version").fetchone()[0]
+        if latest != data_version:
+            data_version = latest
+            if database.change_version(conn, "timetable") != plan_version:
+                return True
+
+def spawn_worker(camera_source):
+    """Start a warm recognition worker for one room; it loads models in the background"""
+    port = BASE_PORT + len(room_workers)
+    ports = {w["client"].port for w in room_workers.values()}
+    while port in ports:
+        port += 1
     
-    slot_id, subject_id, subject, class_name, teacher, start, end = slot_info
+    env = dict(os.environ)
+    env.setdefault("OMP_NUM_THREADS", str(worker_threads))
+    env.setdefault("TF_NUM_INTRAOP_THREADS", str(worker_threads))
+    env[AUTHKEY_ENV] = WORKER_KEY_HEX
+    
+    script_path = os.path.join(os.path.dirname(__file__), "recognition_worker.py")
+    process = subprocess.Popen(
+        ["python", script_path, "--port", str(port)],
+        cwd=os.path.dirname(script_path),
+        env=env
+    )
+    room_workers[camera_source] = {"process": process, "client": WorkerClient(port, WORKER_KEY)}
+    log(f"Warm worker for camera {camera_source} starting on port {port} ({worker_threads} threads)")
+    return room_workers[camera_source]
+
+def get_room_worker(camera_source):
+    """Return the room's worker, (re)spawning it if it is missing or dead"""
+    worker = room_workers.get(camera_source)
+    if worker is None or worker["process"].poll() is not None:
+        worker = spawn_worker(camera_source)
+    return worker
+
+def prewarm_workers(plan):
+    """Pre-start a worker for every room with a class today"""
+    global worker_threads
+    worker_threads = threads_per_worker(plan)
+    for start, end, slot in plan:
+        get_room_worker(slot[5])
+
+def shutdown_workers():
+    for camera_source, worker in list(room_workers.items()):
+        try:
+            worker["client"].send("shutdown")
+            worker["process"].wait(timeout=60)
+        except Exception:
+            worker["process"].terminate()
+    room_workers.clear()
+
+def send_start(slot_info):
+    """Tell the room's worker to start recording this slot"""
+    slot_id, subject_id, class_id, subject, class_name, camera_source, teacher, start, end = slot_info
+    
+    worker = get_room_worker(camera_source)
+    waited = time.perf_counter()
+    if not worker["client"].wait_ready(WORKER_START_TIMEOUT):
+        raise RuntimeError(f"worker for camera {camera_source} did not start")
+    # Minutes left in the slot: the full period at its start, the rest after a restart
+    end_time = datetime.combine(datetime.now().date(), datetime.strptime(end, "%H:%M").time())
+    duration = max(1.0, (end_time - datetime.now()).total_seconds() / 60)
+    worker["client"].send("start", slot_id=slot_id, subject_id=subject_id, class_id=class_id,
+                          camera=camera_source, duration=duration)
+    log(f"Session command sent after {time.perf_counter() - waited:.1f}s wait for the worker")
+
+def start_session(slot_info):
+    """Start the face recognition camera for one class"""
+    slot_id, subject_id, class_id, subject, class_name, camera_source, teacher, start, end = slot_info
     
     log("=" * 50)
     log(f"CLASS STARTED: {subject}")
     log(f"Class: {class_name} | Teacher: {teacher}")
     log(f"Time: {start} - {end}")
     log(f"Subject ID: {subject_id} (for attendance tagging)")
+    log(f"Class ID: {class_id} (only this class's faces are loaded)")
+    log(f"Camera: {camera_source}")
     log("Starting face recognition...")
     log("=" * 50)
     
-    # Start live_recognition.py in background with subject_id
-    script_path = os.path.join(os.path.dirname(__file__), "live_recognition.py")
-    running_process = subprocess.Popen(
-        ["python", script_path, str(subject_id)],
-        cwd=os.path.dirname(script_path)
-    )
+    workers[slot_id] = {"camera": camera_source, "slot": slot_info, "restarts": 0}
+    send_start(slot_info)
 
-def stop_session():
-    """Stop the face recognition camera"""
-    global running_process
+def stop_session(slot_id):
+    """Stop the face recognition camera for one class"""
+    session = workers.pop(slot_id, None)
+    if session is None:
+        return
     
     log("=" * 50)
-    log("CLASS ENDED - Stopping attendance session")
-    log("Attendance saved automatically!")
+    log(f"CLASS ENDED: {session['slot'][3]} - Stopping attendance session")
+    
+    worker = room_workers.get(session["camera"])
+    if worker is not None and worker["process"].poll() is None:
+        # The worker saves the report and finalizes before replying
+        try:
+            reply = worker["client"].send("stop", slot_id=slot_id)
+            if reply.get("ok"):
+                log(f"Attendance saved automatically! ({reply.get('state')})")
+            else:
+                log(f"[!] Worker did not stop: {reply.get('error')}")
+        except (OSError, EOFError) as e:
+            log(f"[!] Could not reach worker: {e}")
     log("=" * 50)
+
+def check_workers():
+    """Restart sessions whose worker crashed or failed; forget ones that finished"""
+    for slot_id, session in list(workers.items()):
+        subject = session["slot"][3]
+        worker = room_workers.get(session["camera"])
+        
+        if worker is not None and worker["process"].poll() is None:
+            try:
+                state = worker["client"].send("status")["state"]
+            except (OSError, EOFError):
+                continue  # still loading models
+            if state in ("loading", "running", "saving"):
+                continue
+            if state == "finished":
+                log(f"Session for {subject} finished")
+                del workers[slot_id]
+                continue
+            problem = f"session {state}"
+        else:
+            problem = "worker exited"
+        
+        if session["restarts"] < MAX_RESTARTS:
+            session["restarts"] += 1
+            log(f"[!] {subject}: {problem} - restarting ({session['restarts']}/{MAX_RESTARTS})")
+            try:
+                send_start(session["slot"])
+            except Exception as e:
+                log(f"[!] Restart failed: {e}")
+        else:
+            log(f"[!] {subject} keeps failing - giving up for this class")
+            del workers[slot_id]
+
+def sync_sessions(active_slots):
+    """Start workers for newly active slots and stop those whose class ended"""
+    active = {slot[0]: slot for slot in active_slots}
+    
+    for slot_id in list(workers):
+        if slot_id not in active:
+            stop_session(slot_id)
     
-    if running_process:
-        running_process.terminate()
-        running_process = None
+    busy = {session["camera"]: session["slot"] for session in workers.values()}
+    for slot_id, slot in active.items():
+        # Once per slot per day: a worker that finished or gave up stays stopped
+        if slot_id not in workers and slot_id not in started_today:
+            # One session per camera: a second class would end the first one's
+            # session; it is tried again when the camera frees up
+            if slot[5] in busy:
+                log(f"[!] {slot[3]} ({slot[4]}) not started: camera {slot[5]} "
+                    f"is in use by {busy[slot[5]][3]} ({busy[slot[5]][4]})")
+                continue
+            start_session(slot)
+            started_today.add(slot_id)
+            busy[slot[5]] = slot
 
 def main():
-    global current_session
-    
     print("")
     print("=" * 60)
     print("   SMART ATTENDANCE - AUTO SCHEDULER")
     print("   The system is now watching the timetable...")
     print("=" * 60)
     print("")
-    log("Auto scheduler started. Checking every 30 seconds...")
+    log("Auto scheduler started. Waking at each class start/end...")
     log(f"Today is {datetime.now().strftime('%A, %B %d, %Y')}")
     print("")
     
+    conn = database.connect()
+    database.migrate(conn)
+    
+    plan = []
+    plan_day = None
+    plan_version = None
+    
     while True:
         try:
-            slot = get_current_slot()
+            now = datetime.now()
             
-            # Class is happening now
-            if slot:
-                slot_id = slot[0]
-                
-                # New class started (different from current)
-                if current_session != slot_id:
-                    # Stop previous session if any
-                    if current_session is not None:
-                        stop_session()
-                    
-                    # Start new session
-                    start_session(slot)
-                    current_session = slot_id
+            # Reload the day plan on a new day or after a timetable edit
+            version = database.change_version(conn, "timetable")
+            if plan_day != now.date() or version != plan_version:
+                if plan_day != now.date():
+                    started_today.clear()
+                plan = load_day_plan(conn, now)
+                plan_day = now.date()
+                plan_version = version
+                log(f"Day plan loaded: {len(plan)} slots for {now.strftime('%A')}")
+                prewarm_workers(plan)
             
-            # No class right now
-            else:
-                if current_session is not None:
-                    stop_session()
-                    current_session = None
+            # One worker per class happening now, in every room
+            check_workers()
+            sync_sessions(get_active_slots(plan, now))
             
-            # Wait before next check
-            time.sleep(30)
+            # Sleep until the next start/end boundary (or a timetable edit)
+            wake = next_boundary(plan, now)
+            if wait_until(conn, wake, plan_version):
+                log("Timetable changed - reloading day plan")
             
         except KeyboardInterrupt:
             log("Scheduler stopped by user")
-            if running_process:
-                running_process.terminate()
+            for slot_id in list(workers):
+                stop_session(slot_id)
+            shutdown_workers()
             break
         except Exception as e:
             log(f"Error: {e}")
-            time.sleep(30)
+            time.sleep(CHANGE_POLL_SECONDS)
+    
+    conn.close()
 
 if __name__ == "__main__":
     main()
@@ -1,11 +1,22 @@
-from flask import Flask, render_template, jsonify, request, redirect, session, url_for, send_file
+from flask import Flask, Response, render_template, jsonify, request, redirect, session, url_for, send_file, g
 import sqlite3
 import os
+import io
+import csv
+import hashlib
+import hmac
+import json
+import secrets
+import sys
 import subprocess
+import tempfile
 import openpyxl
-from io import BytesIO
+from openpyxl.utils import get_column_letter
 from datetime import date
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import database
+
 app = Flask(
     __name__,
     template_folder="../frontend/templates",
@@ -14,13 +25,36 @@ app = Flask(
 
 app.secret_key = "supersecretkey"
 
-DB_PATH = "../database.db"
+DB_PATH = database.DB_PATH
+
+# Connections are reused across requests instead of opened per request
+pool = database.ConnectionPool(DB_PATH, max_size=8, row_factory=sqlite3.Row)
+
+# One live_attendance watcher for every open live monitor (started on first use)
+live_feed = database.LiveFeed(DB_PATH)
+LIVE_HEARTBEAT_SECONDS = 15
+LIVE_KEY_SECRET = secrets.token_bytes(16)
+
+# Bring an existing database up to date (indexes, camera_source, ...)
+if os.path.exists(DB_PATH):
+    migrate_conn = database.connect(DB_PATH)
+    database.migrate(migrate_conn)
+    migrate_conn.close()
 
 def get_connection():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    """Check out this request's pooled connection; conn.close() hands it back"""
+    conn = g.get("db_conn")
+    if conn is None or conn.released:
+        conn = g.db_conn = pool.checkout()
     return conn
 
+@app.teardown_appcontext
+def release_connection(exception):
+    # Covers routes that return or raise before calling conn.close()
+    conn = g.pop("db_conn", None)
+    if conn is not None:
+        conn.close()
+
 # -------- LOGIN SYSTEM --------
 def validate_user(email, password):
     conn = get_connection()
@@ -361,7 +395,9 @@ def add_class():
     if request.method == "POST":
         class_name = request.form["class_name"]
         section = request.form["section"]
-        cursor.execute("INSERT INTO classes (class_name, room_no) VALUES (?, ?)", (class_name, section))
+        camera_source = request.form.get("camera_source", "").strip() or None
+        cursor.execute("INSERT INTO classes (class_name, room_no, camera_source) VALUES (?, ?, ?)",
+                       (class_name, section, camera_source))
         conn.commit()
         message = f"Class '{class_name} - {section}' added successfully!"
     
@@ -470,6 +506,159 @@ def live_attendance():
 
     return jsonify(data)
 
+def live_key(student_id):
+    """
+    Opaque per-server key for a live row: the monitor page is public, so
+    the stream must not carry student ids any more than /api/live does
+    """
+    return hmac.new(LIVE_KEY_SECRET, str(student_id).encode(), hashlib.sha256).hexdigest()[:16]
+
+def live_row(r):
+    """A LiveFeed row in the /api/live format, with an opaque key for client-side merging"""
+    return {
+        "key": live_key(r["student_id"]),
+        "name": r["name"],
+        "entry": r["face_entry"],
+        "exit": r["face_exit"],
+        "duration": r["duration"],
+        "status": r["status"]
+    }
+
+@app.route("/api/live/stream")
+def live_stream():
+    """
+    Server-Sent Events for the live monitor: a "snapshot" event with every
+    row, then one message per change with only the changed rows ("snapshot"
+    again if rows were removed). Rows come from the shared live_feed, so
+    open screens add no database reads.
+    """
+    snapshot, subscriber = live_feed.subscribe()
+
+    def generate():
+        try:
+            yield f"event: snapshot\ndata: {json.dumps([live_row(r) for r in snapshot])}\n\n"
+            while True:
+                reset, rows = subscriber.get(timeout=LIVE_HEARTBEAT_SECONDS)
+                data = json.dumps([live_row(r) for r in rows])
+                if reset:
+                    yield f"event: snapshot\ndata: {data}\n\n"
+                elif rows:
+                    yield f"data: {data}\n\n"
+                else:
+                    # Comment line; keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+        finally:
+            live_feed.unsubscribe(subscriber)
+
+    return Response(generate(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route("/api/presence_timeline")
+def presence_timeline():
+    """Presence intervals per student for one subject and day (default today)"""
+    role = session.get("role")
+    if role not in ("student", "teacher", "admin"):
+        return redirect("/login")
+
+    subject_id = request.args.get("subject_id", type=int)
+    day = request.args.get("date", date.today().isoformat())
+
+    query = """
+        SELECT presence_timeline.student_id, users.name, presence_timeline.session_start,
+               presence_timeline.intervals, presence_timeline.present_seconds,
+               presence_timeline.observed_seconds
+        FROM presence_timeline
+        JOIN users ON presence_timeline.student_id = users.id
+        WHERE presence_timeline.date = ? AND presence_timeline.subject_id = ?
+    """
+    params = [day, subject_id]
+    # Students only see their own timeline, teachers only the subjects they teach
+    if role == "student":
+        query += " AND presence_timeline.student_id = ?"
+        params.append(session["user_id"])
+    elif role == "teacher":
+        query += " AND presence_timeline.subject_id IN (SELECT subject_id FROM timetable WHERE teacher_id = ?)"
+        params.append(session["user_id"])
+    query += " ORDER BY users.name, presence_timeline.session_start"
+
+    conn = get_connection()
+    rows = conn.execute(query, params).fetchall()
+    conn.close()
+
+    return jsonify([{
+        "student_id": r["student_id"],
+        "name": r["name"],
+        "session_start": r["session_start"],
+        "intervals": json.loads(r["intervals"] or "[]"),
+        "present_minutes": round(r["present_seconds"] / 60, 2),
+        "observed_minutes": round(r["observed_seconds"] / 60, 2),
+    } for r in rows])
+
+@app.route("/api/attendance_summary")
+def attendance_summary():
+    """
+    Attendance percentages from the attendance_monthly counts.
+
+    Students get their own subjects, teachers every student in the subjects
+    they teach, admins everyone (or one class with ?class_id=). Optional
+    ?from= and ?to= months (YYYY-MM) limit the range.
+    """
+    role = session.get("role")
+    if role not in ("student", "teacher", "admin"):
+        return redirect("/login")
+
+    month_from = (request.args.get("from") or "0000-00")[:7]
+    month_to = (request.args.get("to") or "9999-99")[:7]
+
+    query = """
+        SELECT attendance_monthly.student_id, users.name, attendance_monthly.subject_id,
+               subjects.subject_name, SUM(present) AS present, SUM(absent) AS absent
+        FROM attendance_monthly
+        JOIN users ON attendance_monthly.student_id = users.id
+        JOIN subjects ON attendance_monthly.subject_id = subjects.id
+        WHERE attendance_monthly.month BETWEEN ? AND ?
+    """
+    params = [month_from, month_to]
+    if role == "student":
+        query += " AND attendance_monthly.student_id = ?"
+        params.append(session["user_id"])
+    elif role == "teacher":
+        query += " AND attendance_monthly.subject_id IN (SELECT subject_id FROM timetable WHERE teacher_id = ?)"
+        params.append(session["user_id"])
+    elif request.args.get("class_id"):
+        query += " AND users.class_id = ?"
+        params.append(request.args.get("class_id", type=int))
+    query += """
+        GROUP BY attendance_monthly.student_id, attendance_monthly.subject_id
+        ORDER BY subjects.subject_name, users.name
+    """
+
+    conn = get_connection()
+    rows = conn.execute(query, params).fetchall()
+    conn.close()
+
+    data = []
+    for r in rows:
+        total = r["present"] + r["absent"]
+        data.append({
+            "student_id": r["student_id"],
+            "name": r["name"],
+            "subject_id": r["subject_id"],
+            "subject": r["subject_name"],
+            "present": r["present"],
+            "absent": r["absent"],
+            "total": total,
+            "percentage": round(r["present"] / total * 100, 1) if total else None
+        })
+
+    return jsonify(data)
+
+@app.route("/admin/pool_stats")
+def pool_stats():
+    if session.get("role") != "admin":
+        return redirect("/login")
+    return jsonify(dict(pool.stats(), live_feed=live_feed.stats()))
+
 # -------- TIMETABLE ROUTES --------
 @app.route("/timetable")
 def timetable():
@@ -505,6 +694,93 @@ def schedule_api():
 
     return jsonify([dict(r) for r in rows])
 
+# -------- REPORT EXPORT --------
+EXPORT_HEADER = ["Student Name", "Subject", "Date", "Status"]
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CSV_CHUNK_SIZE = 64 * 1024
+# Exports up to this size stay in memory, larger ones spill to a temp file
+XLSX_SPOOL_SIZE = 16 * 1024 * 1024
+
+def report_range():
+    """(from, to) dates from the request; a single "date" or today when missing"""
+    values = request.values
+    single = values.get("date") or date.today().isoformat()
+    date_from = values.get("from") or single
+    date_to = values.get("to") or date_from
+    if date_to < date_from:
+        date_from, date_to = date_to, date_from
+    return date_from, date_to
+
+def export_attendance(rows, filename, preamble=(), fmt="xlsx"):
+    """
+    Send query rows as a download, reading the cursor once.
+
+    csv streams into the response body chunk by chunk. xlsx goes through a
+    write-only workbook; its column widths must come before the rows in the
+    sheet, so rows are kept as plain tuples while the widths are measured.
+    """
+    if fmt == "csv":
+        # Teardown runs once the view returns, before the body is sent, so
+        # the cursor's connection is taken out of g and handed back only
+        # when the response is closed
+        conn = g.pop("db_conn", None)
+
+        def generate():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for line in list(preamble) + [EXPORT_HEADER]:
+                writer.writerow(line)
+            for r in rows:
+                writer.writerow(tuple(r))
+                if buffer.tell() >= CSV_CHUNK_SIZE:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue()
+
+        response = Response(generate(), mimetype="text/csv",
+                            headers={"Content-Disposition": f"attachment; filename=\"{filename}.csv\""})
+        if conn is not None:
+            response.call_on_close(conn.close)
+        return response
+
+    widths = [len(h) for h in EXPORT_HEADER]
+    for line in preamble:
+        for i, value in enumerate(line):
+            widths[i] = max(widths[i], len(str(value)))
+
+    data = []
+    for r in rows:
+        values = tuple(r)
+        for i, value in enumerate(values):
+            widths[i] = max(widths[i], len(str(value)))
+        data.append(values)
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Attendance")
+    for i, width in enumerate(widths):
+        ws.column_dimensions[get_column_letter(i + 1)].width = width + 2
+
+    for line in preamble:
+        ws.append(line)
+    ws.append(EXPORT_HEADER)
+    for values in data:
+        ws.append(values)
+
+    file_stream = tempfile.SpooledTemporaryFile(max_size=XLSX_SPOOL_SIZE)
+    wb.save(file_stream)
+    file_stream.seek(0)
+
+    return send_file(
+        file_stream,
+        download_name=f"{filename}.xlsx",
+        as_attachment=True,
+        mimetype=XLSX_MIMETYPE
+    )
+
+def range_label(date_from, date_to):
+    return date_from if date_from == date_to else f"{date_from}_to_{date_to}"
+
 # -------- TEACHER: DOWNLOAD REPORT --------
 @app.route("/teacher/download_report")
 def teacher_download_report():
@@ -512,59 +788,25 @@ def teacher_download_report():
         return redirect("/login")
     
     teacher_id = session["user_id"]
-    today = date.today().isoformat()
+    date_from, date_to = report_range()
     
     conn = get_connection()
     cursor = conn.cursor()
     
     # Get attendance for subjects taught by this teacher
     cursor.execute("""
-        SELECT DISTINCT users.name as student_name, subjects.subject_name, 
+        SELECT users.name as student_name, subjects.subject_name,
                attendance.date, attendance.status
         FROM attendance
         JOIN users ON attendance.student_id = users.id
         JOIN subjects ON attendance.subject_id = subjects.id
-        JOIN timetable ON timetable.subject_id = subjects.id
-        WHERE timetable.teacher_id = ? AND attendance.date = ?
-        ORDER BY subjects.subject_name, users.name
-    """, (teacher_id, today))
+        WHERE attendance.subject_id IN (SELECT subject_id FROM timetable WHERE teacher_id = ?)
+          AND attendance.date BETWEEN ? AND ?
+        ORDER BY subjects.subject_name, attendance.date, users.name
+    """, (teacher_id, date_from, date_to))
     
-    rows = cursor.fetchall()
-    conn.close()
-    
-    # Create Excel workbook
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Attendance"
-    
-    # Header styling
-    ws.append(["Student Name", "Subject", "Date", "Status"])
-    
-    for r in rows:
-        ws.append([r["student_name"], r["subject_name"], r["date"], r["status"]])
-    
-    # Auto-adjust column widths
-    for column in ws.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        ws.column_dimensions[column_letter].width = max_length + 2
-    
-    file_stream = BytesIO()
-    wb.save(file_stream)
-    file_stream.seek(0)
-    
-    return send_file(
-        file_stream,
-        download_name=f"Teacher_Attendance_{today}.xlsx",
-        as_attachment=True,
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
+    return export_attendance(cursor, f"Teacher_Attendance_{range_label(date_from, date_to)}",
+                             fmt=request.args.get("format", "xlsx"))
 
 # -------- ADMIN: DOWNLOAD REPORT --------
 @app.route("/admin/download_report", methods=["GET", "POST"])
@@ -577,64 +819,31 @@ def admin_download_report():
     
     if request.method == "POST":
         class_id = request.form["class_id"]
-        selected_date = request.form["date"]
+        date_from, date_to = report_range()
         
         # Get class name for filename
         cursor.execute("SELECT class_name FROM classes WHERE id = ?", (class_id,))
         class_info = cursor.fetchone()
         class_name = class_info["class_name"] if class_info else "Unknown"
         
-        # Get attendance for selected class and date
+        # Get attendance for selected class and date range
         cursor.execute("""
             SELECT users.name as student_name, subjects.subject_name, 
                    attendance.date, attendance.status
             FROM attendance
             JOIN users ON attendance.student_id = users.id
             JOIN subjects ON attendance.subject_id = subjects.id
-            WHERE users.class_id = ? AND attendance.date = ?
-            ORDER BY subjects.subject_name, users.name
-        """, (class_id, selected_date))
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        # Create Excel workbook
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Attendance"
-        
-        # Add header info
-        ws.append([f"Class: {class_name}"])
-        ws.append([f"Date: {selected_date}"])
-        ws.append([])  # Empty row
-        ws.append(["Student Name", "Subject", "Date", "Status"])
-        
-        for r in rows:
-            ws.append([r["student_name"], r["subject_name"], r["date"], r["status"]])
-        
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            ws.column_dimensions[column_letter].width = max_length + 2
+            WHERE users.class_id = ? AND attendance.date BETWEEN ? AND ?
+            ORDER BY subjects.subject_name, attendance.date, users.name
+        """, (class_id, date_from, date_to))
         
-        file_stream = BytesIO()
-        wb.save(file_stream)
-        file_stream.seek(0)
+        # Header info above the table
+        date_text = date_from if date_from == date_to else f"{date_from} to {date_to}"
+        preamble = [[f"Class: {class_name}"], [f"Date: {date_text}"], []]
         
         safe_class_name = class_name.replace(" ", "_")
-        return send_file(
-            file_stream,
-            download_name=f"{safe_class_name}_Attendance_{selected_date}.xlsx",
-            as_attachment=True,
-            mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
+        return export_attendance(cursor, f"{safe_class_name}_Attendance_{range_label(date_from, date_to)}",
+                                 preamble=preamble, fmt=request.form.get("format", "xlsx"))
     
     # GET request - show form
     classes = cursor.execute("SELECT id, class_name, room_no FROM classes").fetchall()
@@ -0,0 +1,83 @@
+"""
+EMBEDDING BENCHMARK - Smart Attendance System
+=============================================
+Per-face ArcFace cost for 1, 10 and 50 faces in a frame: one
+DeepFace.represent call per aligned crop (the previous engine) versus
+live_recognition.embed_faces(), which runs the crops as batches
+(through TensorFlow, or ONNX Runtime with --engine onnx).
+
+Crops are random pixels by default (cost does not depend on content),
+or copies of a real photo with --image.
+
+Needs the full recognition stack (DeepFace, OpenCV):
+    python benchmarks/bench_embedding.py
+    python benchmarks/bench_embedding.py --faces 1 10 50 100 --batch-size 16
+    python benchmarks/bench_embedding.py --engine onnx
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import live_recognition
+from deepface import DeepFace
+
+def make_faces(count, image, seed):
+    """Aligned crops in extract_faces format (RGB, 0-1)"""
+    if image is not None:
+        crop = cv2.resize(cv2.imread(image), (112, 112))[:, :, ::-1].astype(np.float32) / 255
+        return [{"face": crop.copy()} for _ in range(count)]
+    rng = np.random.default_rng(seed)
+    return [{"face": rng.random((112, 112, 3), dtype=np.float32)} for _ in range(count)]
+
+def embed_one_by_one(faces):
+    embeddings = []
+    for face in faces:
+        crop = (face["face"][:, :, ::-1] * 255).astype(np.uint8)
+        result = DeepFace.represent(img_path=crop, model_name=live_recognition.MODEL_NAME,
+                                    detector_backend="skip", enforce_detection=False)
+        embeddings.append(result[0]["embedding"])
+    return embeddings
+
+def time_call(fn, repeat):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--faces", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--batch-size", type=int, default=live_recognition.EMBED_BATCH_SIZE)
+    parser.add_argument("--engine", choices=["deepface", "onnx"], default="deepface",
+                        help="backend for the batched path (see onnx_backend.py)")
+    parser.add_argument("--image", help="use this photo for every crop")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print("Loading ArcFace...")
+    live_recognition.warm_up()
+    live_recognition.INFERENCE_BACKEND = args.engine
+    live_recognition.warm_up()
+
+    print("")
+    print(f"{'faces':>6}{'single (ms/face)':>20}{'batched (ms/face)':>20}{'speedup':>10}{'max diff':>12}")
+    print("-" * 68)
+    for count in args.faces:
+        faces = make_faces(count, args.image, args.seed)
+        single, reference = time_call(lambda: embed_one_by_one(faces), args.repeat)
+        batched, embeddings = time_call(lambda: live_recognition.embed_faces(faces, args.batch_size), args.repeat)
+        diff = float(np.max(np.abs(np.asarray(reference) - np.asarray(embeddings))))
+        print(f"{count:>6}{single / count * 1000:>20.1f}{batched / count * 1000:>20.1f}"
+              f"{single / batched:>9.1f}x{diff:>12.2e}")
+
+if __name__ == "__main__":
+    main()
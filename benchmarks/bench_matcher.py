@@ -0,0 +1,83 @@
+"""
+MATCHER BENCHMARK - Smart Attendance System
+===========================================
+Compares the exact and IVF face matchers on a synthetic gallery.
+
+Reports per-frame match latency and recall of the IVF index against
+the exact matcher (fraction of probes given the same best match).
+
+Run:
+    python benchmarks/bench_matcher.py
+    python benchmarks/bench_matcher.py --gallery 50000 --faces 40 --n-probe 4 8 16
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from face_matcher import create_matcher
+
+def make_gallery(count, dim, clusters, seed):
+    """Clustered unit vectors, roughly like real face embeddings"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    gallery = centers[rng.integers(0, clusters, count)]
+    gallery += 0.8 * rng.standard_normal((count, dim)).astype(np.float32)
+    return gallery
+
+def make_probes(gallery, count, noise, seed):
+    """Noisy copies of random enrolled faces (a student seen by the camera)"""
+    rng = np.random.default_rng(seed + 1)
+    picks = rng.integers(0, len(gallery), count)
+    return gallery[picks] + noise * rng.standard_normal((count, gallery.shape[1])).astype(np.float32)
+
+def time_matcher(matcher, frames, threshold):
+    start = time.perf_counter()
+    results = [matcher.match(frame, threshold)[0] for frame in frames]
+    elapsed = time.perf_counter() - start
+    return elapsed / len(frames) * 1000, np.concatenate(results)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--gallery", type=int, default=20000, help="enrolled faces")
+    parser.add_argument("--dim", type=int, default=512, help="embedding size (ArcFace = 512)")
+    parser.add_argument("--faces", type=int, default=40, help="faces per frame")
+    parser.add_argument("--frames", type=int, default=50, help="frames to time")
+    parser.add_argument("--n-lists", type=int, default=None, help="IVF cells (default sqrt(gallery))")
+    parser.add_argument("--n-probe", type=int, nargs="+", default=[1, 4, 8, 16], help="IVF cells searched")
+    parser.add_argument("--noise", type=float, default=1.7, help="probe noise (1.7 ~ cosine 0.6 to its match)")
+    parser.add_argument("--threshold", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    gallery = make_gallery(args.gallery, args.dim, max(1, args.gallery // 50), args.seed)
+    probes = make_probes(gallery, args.faces * args.frames, args.noise, args.seed)
+    frames = np.split(probes, args.frames)
+
+    print(f"Gallery: {args.gallery} x {args.dim} | {args.faces} faces/frame | {args.frames} frames")
+    print("")
+    print(f"{'backend':<18}{'build (s)':>12}{'ms/frame':>12}{'recall':>10}")
+    print("-" * 52)
+
+    start = time.perf_counter()
+    exact = create_matcher(gallery, "exact")
+    build = time.perf_counter() - start
+    exact_ms, truth = time_matcher(exact, frames, args.threshold)
+    print(f"{'exact':<18}{build:>12.2f}{exact_ms:>12.2f}{1.0:>10.3f}")
+
+    for n_probe in args.n_probe:
+        start = time.perf_counter()
+        ivf = create_matcher(gallery, "ivf", n_lists=args.n_lists, n_probe=n_probe, seed=args.seed)
+        build = time.perf_counter() - start
+        ivf_ms, found = time_matcher(ivf, frames, args.threshold)
+        recall = float(np.mean(found == truth))
+        label = f"ivf {ivf.n_lists}/{ivf.n_probe}"
+        print(f"{label:<18}{build:>12.2f}{ivf_ms:>12.2f}{recall:>10.3f}")
+
+if __name__ == "__main__":
+    main()
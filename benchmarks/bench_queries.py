@@ -0,0 +1,212 @@
+"""
+QUERY BENCHMARK - Smart Attendance System
+=========================================
+Times the hot attendance, log and timetable queries on a synthetic
+semester of data, before and after database.migrate() adds the indexes.
+
+"before" runs the original queries (DATE(timestamp) = ?) on a database
+without secondary indexes; "after" runs the index-friendly versions on
+the migrated database. Dashboard percentages are computed from the whole
+attendance table before and from attendance_monthly after.
+
+Run:
+    python benchmarks/bench_queries.py
+    python benchmarks/bench_queries.py --classes 40 --days 120
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import database
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+SLOTS = [("09:00", "10:00"), ("10:00", "11:00"), ("11:15", "12:15"),
+         ("13:00", "14:00"), ("14:00", "15:00"), ("15:00", "16:00")]
+
+SCHEMA = """
+CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, email TEXT UNIQUE NOT NULL,
+                    password TEXT NOT NULL, role TEXT NOT NULL, class_id INTEGER, rfid_uid TEXT);
+CREATE TABLE classes (id INTEGER PRIMARY KEY AUTOINCREMENT, class_name TEXT NOT NULL, room_no TEXT);
+CREATE TABLE subjects (id INTEGER PRIMARY KEY AUTOINCREMENT, subject_name TEXT NOT NULL);
+CREATE TABLE timetable (id INTEGER PRIMARY KEY AUTOINCREMENT, class_id INTEGER, subject_id INTEGER,
+                        teacher_id INTEGER, day TEXT, start_time TEXT, end_time TEXT);
+CREATE TABLE attendance (id INTEGER PRIMARY KEY AUTOINCREMENT, student_id INTEGER, subject_id INTEGER,
+                         date TEXT, status TEXT);
+CREATE TABLE face_logs (id INTEGER PRIMARY KEY AUTOINCREMENT, student_id INTEGER, subject_id INTEGER,
+                        duration REAL, date TEXT);
+CREATE TABLE rfid_logs (id INTEGER PRIMARY KEY AUTOINCREMENT, student_id INTEGER, subject_id INTEGER,
+                        timestamp TEXT);
+CREATE TABLE live_attendance (student_id TEXT PRIMARY KEY, name TEXT, face_entry TEXT, face_exit TEXT,
+                              duration REAL, status TEXT);
+"""
+
+def build_semester(path, classes, students_per_class, days, seed):
+    """One class per room, six slots a day, every student logged every slot"""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+
+    subjects = classes * 2
+    conn.executemany("INSERT INTO subjects (subject_name) VALUES (?)",
+                     [(f"Subject {i}",) for i in range(subjects)])
+    conn.executemany("INSERT INTO classes (class_name, room_no) VALUES (?, ?)",
+                     [(f"Class {i}", f"R{i}") for i in range(classes)])
+    conn.executemany("INSERT INTO users (name, email, password, role) VALUES (?, ?, 'x', 'teacher')",
+                     [(f"Teacher {i}", f"t{i}@x") for i in range(classes)])
+    conn.executemany("INSERT INTO users (name, email, password, role, class_id) VALUES (?, ?, 'x', 'student', ?)",
+                     [(f"Student {c}-{i}", f"s{c}-{i}@x", c + 1)
+                      for c in range(classes) for i in range(students_per_class)])
+
+    timetable = []
+    for c in range(classes):
+        for day in DAYS:
+            for start, end in SLOTS:
+                timetable.append((c + 1, rng.randint(1, subjects), c + 1, day, start, end))
+    conn.executemany("""INSERT INTO timetable (class_id, subject_id, teacher_id, day, start_time, end_time)
+                        VALUES (?, ?, ?, ?, ?, ?)""", timetable)
+
+    students = conn.execute("SELECT id, class_id FROM users WHERE role = 'student'").fetchall()
+    by_class = {}
+    for sid, cid in students:
+        by_class.setdefault(cid, []).append(sid)
+
+    first_day = date(2026, 1, 5)
+    for d in range(days):
+        day = first_day + timedelta(days=d)
+        if day.weekday() == 6:
+            continue
+        day_str = day.isoformat()
+        weekday = DAYS[day.weekday()]
+        rfid, face, attendance = [], [], []
+        for cid, subject_id, _, slot_day, start, _ in timetable:
+            if slot_day != weekday:
+                continue
+            for sid in by_class[cid]:
+                rfid.append((sid, subject_id, f"{day_str} {start}:{rng.randint(10, 59)}"))
+                face.append((sid, subject_id, rng.uniform(0, 60), day_str))
+                attendance.append((sid, subject_id, day_str, rng.choice(["Present", "Absent"])))
+        conn.executemany("INSERT INTO rfid_logs (student_id, subject_id, timestamp) VALUES (?, ?, ?)", rfid)
+        conn.executemany("INSERT INTO face_logs (student_id, subject_id, duration, date) VALUES (?, ?, ?, ?)", face)
+        conn.executemany("INSERT INTO attendance (student_id, subject_id, date, status) VALUES (?, ?, ?, ?)",
+                         attendance)
+    conn.commit()
+    return conn, first_day
+
+def queries(day, subject_id, student_id, class_id, indexed):
+    """(label, sql, params) for each hot query; indexed picks the rewritten form"""
+    day_str = day.isoformat()
+    next_str = (day + timedelta(days=1)).isoformat()
+    weekday = DAYS[day.weekday()]
+
+    if indexed:
+        rfid = ("SELECT DISTINCT student_id FROM rfid_logs "
+                "WHERE subject_id = ? AND timestamp >= ? AND timestamp < ?", (subject_id, day_str, next_str))
+        rfid_all = ("SELECT DISTINCT student_id FROM rfid_logs WHERE timestamp >= ? AND timestamp < ?",
+                    (day_str, next_str))
+        summary = ("SELECT subject_id, SUM(present), SUM(absent) FROM attendance_monthly "
+                   "WHERE student_id = ? GROUP BY subject_id", (student_id,))
+        class_summary = ("""SELECT attendance_monthly.student_id, subject_id, SUM(present), SUM(absent)
+                            FROM attendance_monthly JOIN users ON attendance_monthly.student_id = users.id
+                            WHERE users.class_id = ? GROUP BY attendance_monthly.student_id, subject_id""",
+                         (class_id,))
+    else:
+        rfid = ("SELECT DISTINCT student_id FROM rfid_logs WHERE DATE(timestamp) = ? AND subject_id = ?",
+                (day_str, subject_id))
+        rfid_all = ("SELECT DISTINCT student_id FROM rfid_logs WHERE DATE(timestamp) = ?", (day_str,))
+        summary = ("SELECT subject_id, SUM(status = 'Present'), SUM(status <> 'Present') FROM attendance "
+                   "WHERE student_id = ? GROUP BY subject_id", (student_id,))
+        class_summary = ("""SELECT attendance.student_id, subject_id, SUM(status = 'Present'), SUM(status <> 'Present')
+                            FROM attendance JOIN users ON attendance.student_id = users.id
+                            WHERE users.class_id = ? GROUP BY attendance.student_id, subject_id""",
+                         (class_id,))
+
+    return [
+        ("finalize: rfid_logs by subject", *rfid),
+        ("finalize: rfid_logs by day", *rfid_all),
+        ("finalize: face_logs", "SELECT student_id, subject_id, duration FROM face_logs "
+                                "WHERE date = ? AND subject_id = ?", (day_str, subject_id)),
+        ("finalize: attendance lookup", "SELECT id FROM attendance "
+                                        "WHERE student_id = ? AND subject_id = ? AND date = ?",
+         (student_id, subject_id, day_str)),
+        ("scheduler: current slot", """
+            SELECT timetable.id, timetable.subject_id, subjects.subject_name, classes.class_name,
+                   users.name as teacher, timetable.start_time, timetable.end_time
+            FROM timetable
+            JOIN subjects ON timetable.subject_id = subjects.id
+            JOIN classes ON timetable.class_id = classes.id
+            JOIN users ON timetable.teacher_id = users.id
+            WHERE timetable.day = ? AND timetable.start_time <= ? AND timetable.end_time > ?
+         """, (weekday, "10:30", "10:30")),
+        ("admin: class report", """
+            SELECT users.name, subjects.subject_name, attendance.date, attendance.status
+            FROM attendance
+            JOIN users ON attendance.student_id = users.id
+            JOIN subjects ON attendance.subject_id = subjects.id
+            WHERE users.class_id = ? AND attendance.date = ?
+         """, (class_id, day_str)),
+        ("dashboard: student percentages", *summary),
+        ("dashboard: class percentages", *class_summary),
+    ]
+
+def time_queries(conn, specs, repeat):
+    results = []
+    for label, sql, params in specs:
+        conn.execute(sql, params).fetchall()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            conn.execute(sql, params).fetchall()
+        results.append((label, (time.perf_counter() - start) / repeat * 1000))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--classes", type=int, default=20)
+    parser.add_argument("--students", type=int, default=60, help="students per class")
+    parser.add_argument("--days", type=int, default=100, help="calendar days in the semester")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "semester.db")
+        print("Building synthetic semester...")
+        start = time.perf_counter()
+        conn, first_day = build_semester(path, args.classes, args.students, args.days, args.seed)
+        rows = conn.execute("SELECT COUNT(*) FROM rfid_logs").fetchone()[0]
+        print(f"{rows} rows per log table, built in {time.perf_counter() - start:.1f}s")
+        print("")
+
+        # A mid-semester weekday with a real slot to look up
+        day = first_day + timedelta(days=min(args.days // 2, args.days - 1))
+        if day.weekday() == 6:
+            day -= timedelta(days=1)
+        subject_id, class_id = conn.execute(
+            "SELECT subject_id, class_id FROM timetable WHERE day = ? LIMIT 1", (DAYS[day.weekday()],)).fetchone()
+        student_id = conn.execute("SELECT id FROM users WHERE class_id = ? LIMIT 1", (class_id,)).fetchone()[0]
+
+        before = time_queries(conn, queries(day, subject_id, student_id, class_id, False), args.repeat)
+
+        start = time.perf_counter()
+        database.migrate(conn)
+        migrate_time = time.perf_counter() - start
+
+        after = time_queries(conn, queries(day, subject_id, student_id, class_id, True), args.repeat)
+        conn.close()
+
+    print(f"{'query':<34}{'before (ms)':>14}{'after (ms)':>14}{'speedup':>10}")
+    print("-" * 72)
+    for (label, b), (_, a) in zip(before, after):
+        print(f"{label:<34}{b:>14.3f}{a:>14.3f}{b / a if a else 0:>9.0f}x")
+    print("")
+    print(f"migrate() took {migrate_time:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+REPLAY BENCHMARK - Smart Attendance System
+==========================================
+Replays recorded classroom footage through detection, embedding and
+matching as fast as the CPU allows, and reports end-to-end throughput
+and, given ground truth, recognition accuracy.
+
+Frames are decoded in order; one frame per --interval seconds of footage
+is recognized, the same cadence live_recognition.py uses on a camera.
+
+Ground truth (optional) is a CSV of frame index → student ids in view:
+    frame,student_ids
+    0,101 102
+    30,101 102 107
+
+Only labeled frames that are also analyzed are scored. --track runs the
+face tracker as the live engine does, embedding only new or uncertain
+faces; compare with and without it.
+
+Needs the full recognition stack (DeepFace, OpenCV):
+    python benchmarks/bench_replay.py recordings/class.mp4 --class-id 1
+    python benchmarks/bench_replay.py recordings/class.mp4 --class-id 1 --track
+    python benchmarks/bench_replay.py frames/ --fps 2 --labels frames/labels.csv
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import live_recognition
+from face_gallery import load_class_roster, load_gallery
+from face_matcher import create_matcher
+from face_tracker import FaceTracker
+from frame_sources import open_source
+
+def load_labels(path):
+    """{frame index: set of student ids}"""
+    labels = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            labels[int(row["frame"])] = set(row["student_ids"].split())
+    return labels
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="video file or image folder")
+    parser.add_argument("--class-id", type=int, default=None, help="load only this class's faces")
+    parser.add_argument("--fps", type=float, default=1.0, help="frame rate for image folders")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds of footage between checks")
+    parser.add_argument("--threshold", type=float, default=0.50)
+    parser.add_argument("--backend", default="exact", help="matcher backend")
+    parser.add_argument("--labels", help="ground truth CSV (frame,student_ids)")
+    parser.add_argument("--engine", choices=["deepface", "onnx"], default="deepface",
+                        help="inference backend (see onnx_backend.py)")
+    parser.add_argument("--track", action="store_true", help="re-embed only new or uncertain faces")
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many frames")
+    args = parser.parse_args()
+
+    print("Loading models and gallery...")
+    live_recognition.INFERENCE_BACKEND = args.engine
+    live_recognition.warm_up()
+    roster = load_class_roster(args.class_id) if args.class_id else None
+    known_faces, embeddings = load_gallery(roster=roster, **live_recognition.gallery_options())
+    matcher = create_matcher(embeddings, args.backend)
+    labels = load_labels(args.labels) if args.labels else {}
+    tracker = FaceTracker(args.threshold) if args.track else None
+
+    # speed=0: decode as fast as possible, no real-time pacing
+    source = open_source(args.source, speed=0, image_fps=args.fps)
+    step = max(1, round(source.fps * args.interval))
+
+    decoded = analyzed = faces_seen = embedded = 0
+    detect_time = embed_time = match_time = 0.0
+    tp = fp = fn = scored = 0
+
+    started = time.perf_counter()
+    while args.limit is None or decoded < args.limit:
+        ok, frame = source.read()
+        if not ok:
+            break
+        index = decoded
+        decoded += 1
+        if index % step:
+            continue
+
+        t0 = time.perf_counter()
+        faces = live_recognition.detect_faces(frame)
+        if tracker is not None:
+            tracks, stale = tracker.update([face["box"] for face in faces],
+                                           [face["confidence"] for face in faces])
+        else:
+            stale = list(range(len(faces)))
+        t1 = time.perf_counter()
+        embeddings = live_recognition.embed_faces([faces[i] for i in stale])
+        t2 = time.perf_counter()
+        matches, distances = matcher.match(embeddings, args.threshold)
+        if tracker is not None:
+            for i, match, distance in zip(stale, matches, distances):
+                tracker.assign(tracks[i], match, distance)
+            matches = [track.match for track in tracks]
+        t3 = time.perf_counter()
+
+        analyzed += 1
+        faces_seen += len(faces)
+        embedded += len(stale)
+        detect_time += t1 - t0
+        embed_time += t2 - t1
+        match_time += t3 - t2
+
+        if index in labels:
+            found = {str(known_faces[m]["id"]) for m in matches if m >= 0}
+            truth = labels[index]
+            tp += len(found & truth)
+            fp += len(found - truth)
+            fn += len(truth - found)
+            scored += 1
+    elapsed = time.perf_counter() - started
+    source.release()
+
+    footage = decoded / source.fps
+    print("")
+    print(f"source            {args.source} ({source.fps:.1f} fps, {len(known_faces)} gallery faces)")
+    print(f"frames decoded    {decoded} ({footage:.1f}s of footage)")
+    print(f"frames analyzed   {analyzed} (every {step} frames), {faces_seen} faces, {embedded} embedded")
+    print(f"wall time         {elapsed:.1f}s ({footage / elapsed if elapsed else 0:.1f}x real time)")
+    print(f"end-to-end        {decoded / elapsed if elapsed else 0:.1f} frames/s decoded, "
+          f"{analyzed / elapsed if elapsed else 0:.2f} frames/s analyzed")
+    if analyzed:
+        print(f"per analyzed      {detect_time / analyzed * 1000:.0f} ms detect, "
+              f"{embed_time / analyzed * 1000:.0f} ms embed, {match_time / analyzed * 1000:.2f} ms match")
+    if scored:
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        print(f"accuracy          precision {precision:.3f}, recall {recall:.3f} over {scored} labeled frames")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+REPORT BENCHMARK - Smart Attendance System
+==========================================
+Times the end-of-session Excel report for a large roster: a regular
+openpyxl workbook versus generate_report()'s write-only workbook, both
+fed from the same synthetic SessionResult.
+
+Run:
+    python benchmarks/bench_report.py
+    python benchmarks/bench_report.py --students 5000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import openpyxl
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from live_recognition import generate_report
+from presence import PresenceTimeline, SessionResult
+
+def make_result(students, seed):
+    """A one-hour session where students come and go"""
+    rng = random.Random(seed)
+    started = datetime(2026, 1, 5, 9, 0)
+    result = SessionResult(None, None, started, 3600.0, 3600, 50 / 60)
+    for i in range(students):
+        timeline = PresenceTimeline()
+        t = rng.uniform(0, 600)
+        while t < 3600:
+            stay = rng.uniform(60, 1800)
+            timeline.mark(t, min(t + stay, 3600))
+            t += stay + rng.uniform(10, 600)
+        entry = started + timedelta(seconds=timeline.first_seen) if timeline.intervals else None
+        exit = started + timedelta(seconds=timeline.last_seen) if timeline.intervals else None
+        result.add(str(i + 1), f"Student {i:05d}", timeline, entry, exit)
+    return result
+
+def regular_workbook(result, path):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["Student Name", "Student ID", "Face Entry", "Face Exit", "Duration (Minutes)", "Status"])
+    for student in result.students:
+        ws.append([student.name, student.student_id,
+                   student.entry.strftime("%H:%M:%S") if student.entry else "-",
+                   student.exit.strftime("%H:%M:%S") if student.exit else "-",
+                   student.duration, student.status])
+    wb.save(path)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    result = make_result(args.students, args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        regular_workbook(result, os.path.join(tmp, "regular.xlsx"))
+        regular = time.perf_counter() - start
+
+        start = time.perf_counter()
+        generate_report(result, os.path.join(tmp, "write_only.xlsx"))
+        write_only = time.perf_counter() - start
+
+    print("")
+    print(f"{'workbook':<14}{'time (ms)':>12}   ({args.students} students)")
+    print("-" * 26)
+    print(f"{'regular':<14}{regular * 1000:>12.0f}")
+    print(f"{'write-only':<14}{write_only * 1000:>12.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+SQLITE CONCURRENCY BENCHMARK - Smart Attendance System
+======================================================
+Measures reader/writer throughput on live_attendance with SQLite's
+default settings versus the tuned settings from database.connect().
+
+One writer thread plays the recognizer (UPSERT a batch + commit in a
+loop) while reader threads play live monitor / dashboard requests
+(SELECT ... ORDER BY name). Each thread has its own connection to a
+temporary database file.
+
+Run:
+    python benchmarks/bench_sqlite_concurrency.py
+    python benchmarks/bench_sqlite_concurrency.py --readers 8 --seconds 10
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import database
+
+def connect_default(path):
+    """How every script connected before database.py"""
+    return sqlite3.connect(path)
+
+def create_schema(path, students):
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE live_attendance (
+            student_id TEXT PRIMARY KEY,
+            name TEXT,
+            face_entry TEXT,
+            face_exit TEXT,
+            duration REAL,
+            status TEXT
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO live_attendance VALUES (?, ?, '09:00:00', '09:00:00', 0, 'Present')",
+        [(str(i), f"Student {i:05d}") for i in range(students)],
+    )
+    conn.commit()
+    conn.close()
+
+def writer(connect, path, students, batch, stop, result):
+    conn = connect(path)
+    ops = errors = 0
+    i = 0
+    while not stop.is_set():
+        rows = [(str((i + k) % students), f"Student {(i + k) % students:05d}", "09:00:00",
+                 time.strftime("%H:%M:%S"), i / 100, "Present") for k in range(batch)]
+        i += batch
+        try:
+            conn.executemany("""
+                INSERT INTO live_attendance (student_id, name, face_entry, face_exit, duration, status)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(student_id) DO UPDATE SET
+                    face_exit = excluded.face_exit, duration = excluded.duration
+            """, rows)
+            conn.commit()
+            ops += 1
+        except sqlite3.OperationalError:
+            conn.rollback()
+            errors += 1
+    conn.close()
+    result["write"] = (ops, errors)
+
+def reader(connect, path, stop, result, key):
+    conn = connect(path)
+    ops = errors = 0
+    while not stop.is_set():
+        try:
+            conn.execute("""
+                SELECT name, face_entry, face_exit, duration, status
+                FROM live_attendance ORDER BY name
+            """).fetchall()
+            ops += 1
+        except sqlite3.OperationalError:
+            errors += 1
+    conn.close()
+    result[key] = (ops, errors)
+
+def run(label, connect, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        create_schema(path, args.students)
+        # Apply persistent settings (journal mode) before the threads start
+        connect(path).close()
+
+        stop = threading.Event()
+        result = {}
+        threads = [threading.Thread(target=writer, args=(connect, path, args.students, args.batch, stop, result))]
+        threads += [threading.Thread(target=reader, args=(connect, path, stop, result, f"read{i}"))
+                    for i in range(args.readers)]
+        for t in threads:
+            t.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+
+    writes, write_errors = result["write"]
+    reads = sum(result[f"read{i}"][0] for i in range(args.readers))
+    read_errors = sum(result[f"read{i}"][1] for i in range(args.readers))
+    print(f"{label:<10}{writes / args.seconds:>14.1f}{reads / args.seconds:>14.1f}"
+          f"{write_errors:>12}{read_errors:>12}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=2000, help="rows in live_attendance")
+    parser.add_argument("--batch", type=int, default=40, help="rows per write transaction")
+    parser.add_argument("--readers", type=int, default=4, help="concurrent reader threads")
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration per mode")
+    args = parser.parse_args()
+
+    print(f"{args.students} rows | {args.batch} rows/commit | {args.readers} readers | {args.seconds}s per mode")
+    print("")
+    print(f"{'mode':<10}{'commits/s':>14}{'reads/s':>14}{'w locked':>12}{'r locked':>12}")
+    print("-" * 62)
+    run("default", connect_default, args)
+    run("tuned", database.connect, args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+WORKER START BENCHMARK - Smart Attendance System
+================================================
+Measures how long a class takes to start recognizing faces with a cold
+worker (new process: imports, ArcFace + YuNet build, gallery load) versus
+a warm recognition_worker.py that already has the models loaded.
+
+Both timings run from the moment the session is requested until the
+worker reports its first completed inference ("running").
+
+Needs the full recognition stack (DeepFace, OpenCV) and a camera source:
+    python benchmarks/bench_worker_start.py --camera 0 --class-id 1
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from recognition_worker import AUTHKEY_ENV, WorkerClient, new_authkey
+
+def wait_for_state(client, wanted, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        state = client.send("status")["state"]
+        if state == wanted:
+            return True
+        if state == "failed":
+            return False
+        time.sleep(0.05)
+    return False
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--camera", default="0", help="camera index, video file or stream URL")
+    parser.add_argument("--class-id", type=int, default=None, help="load only this class's faces")
+    parser.add_argument("--port", type=int, default=6099)
+    parser.add_argument("--runs", type=int, default=3, help="warm starts to average")
+    parser.add_argument("--timeout", type=float, default=600)
+    args = parser.parse_args()
+
+    session = {"subject_id": None, "class_id": args.class_id, "camera": args.camera}
+    key, key_hex = new_authkey()
+    client = WorkerClient(args.port, key)
+    env = dict(os.environ, **{AUTHKEY_ENV: key_hex})
+
+    # -------- COLD: new process, models built from scratch --------
+    requested = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, "recognition_worker.py"),
+                                "--port", str(args.port)], cwd=ROOT, env=env)
+    try:
+        if not client.wait_ready(args.timeout):
+            sys.exit("Worker did not start")
+        ready = time.perf_counter()
+        client.send("start", **session)
+        if not wait_for_state(client, "running", args.timeout):
+            sys.exit("Cold session did not reach 'running'")
+        cold = time.perf_counter() - requested
+        cold_load = ready - requested
+        client.send("stop")
+
+        # -------- WARM: same process, models already loaded --------
+        warm = []
+        for _ in range(args.runs):
+            requested = time.perf_counter()
+            client.send("start", **session)
+            if not wait_for_state(client, "running", args.timeout):
+                sys.exit("Warm session did not reach 'running'")
+            warm.append(time.perf_counter() - requested)
+            client.send("stop")
+
+        client.send("shutdown")
+        process.wait(timeout=60)
+    finally:
+        if process.poll() is None:
+            process.terminate()
+
+    print("")
+    print(f"{'start':<8}{'to first inference (s)':>26}")
+    print("-" * 34)
+    print(f"{'cold':<8}{cold:>26.2f}   (process + models: {cold_load:.2f}s)")
+    print(f"{'warm':<8}{sum(warm) / len(warm):>26.2f}   (mean of {len(warm)})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,464 @@
+"""
+DATABASE - Smart Attendance System
+==================================
+Shared SQLite access for every script and the Flask backend.
+
+All connections to database.db go through connect(), which applies the
+same settings everywhere:
+
+    journal_mode = WAL       readers never block the writer and vice versa
+    busy_timeout = 5000 ms   wait for a lock instead of failing at once
+    synchronous  = NORMAL    safe with WAL, far fewer fsyncs than FULL
+    cache_size   = 16 MB     per connection page cache
+
+The Flask backend borrows connections from a ConnectionPool instead of
+opening one per request, and pushes live_attendance changes to monitor
+screens through one shared LiveFeed.
+
+Benchmark reader/writer throughput with and without these settings:
+    python benchmarks/bench_sqlite_concurrency.py
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+# Configuration
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "database.db")
+BUSY_TIMEOUT_MS = 5000
+SYNCHRONOUS = "NORMAL"
+CACHE_SIZE_KB = 16384
+
+def connect(db_path=DB_PATH, row_factory=None, **kwargs):
+    """Open a connection with WAL, busy timeout, synchronous and cache size set"""
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000, **kwargs)
+    if row_factory is not None:
+        conn.row_factory = row_factory
+
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA synchronous = {SYNCHRONOUS}")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+    return conn
+
+# -------- SCHEMA MIGRATIONS --------
+# Applied in order by migrate(); PRAGMA user_version records how many have run.
+# Tables themselves are created by setup_full_system.py.
+MIGRATIONS = [
+    # 1: indexes for the hot attendance, log and timetable queries,
+    #    plus a unique attendance key so finalize can upsert
+    [
+        """DELETE FROM attendance WHERE id NOT IN (
+               SELECT MAX(id) FROM attendance GROUP BY student_id, subject_id, date)""",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_attendance_student_subject_date ON attendance(student_id, subject_id, date)",
+        "CREATE INDEX IF NOT EXISTS ix_attendance_date ON attendance(date)",
+        "CREATE INDEX IF NOT EXISTS ix_rfid_logs_subject_time ON rfid_logs(subject_id, timestamp, student_id)",
+        "CREATE INDEX IF NOT EXISTS ix_rfid_logs_time ON rfid_logs(timestamp)",
+        "CREATE INDEX IF NOT EXISTS ix_face_logs_date_subject ON face_logs(date, subject_id)",
+        "CREATE INDEX IF NOT EXISTS ix_timetable_day_start ON timetable(day, start_time, end_time)",
+        "CREATE INDEX IF NOT EXISTS ix_timetable_class ON timetable(class_id)",
+        "CREATE INDEX IF NOT EXISTS ix_timetable_teacher ON timetable(teacher_id)",
+        "CREATE INDEX IF NOT EXISTS ix_users_class_role ON users(class_id, role)",
+        "ANALYZE",
+    ],
+    # 2: per-table change counters bumped by triggers, so long-running
+    #    processes can poll one row instead of re-reading whole tables
+    [
+        """CREATE TABLE IF NOT EXISTS change_counters (
+               name TEXT PRIMARY KEY,
+               version INTEGER NOT NULL DEFAULT 0)""",
+        "INSERT OR IGNORE INTO change_counters (name, version) VALUES ('timetable', 0)",
+        """CREATE TRIGGER IF NOT EXISTS timetable_insert_counter AFTER INSERT ON timetable
+           BEGIN UPDATE change_counters SET version = version + 1 WHERE name = 'timetable'; END""",
+        """CREATE TRIGGER IF NOT EXISTS timetable_update_counter AFTER UPDATE ON timetable
+           BEGIN UPDATE change_counters SET version = version + 1 WHERE name = 'timetable'; END""",
+        """CREATE TRIGGER IF NOT EXISTS timetable_delete_counter AFTER DELETE ON timetable
+           BEGIN UPDATE change_counters SET version = version + 1 WHERE name = 'timetable'; END""",
+    ],
+    # 3: camera per room, so concurrent classes each record their own camera
+    [
+        "ALTER TABLE classes ADD COLUMN camera_source TEXT",
+    ],
+    # 4: per-student presence intervals of each face session (see presence.py)
+    [
+        """CREATE TABLE IF NOT EXISTS presence_timeline (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               student_id INTEGER,
+               subject_id INTEGER,
+               date TEXT,
+               session_start TEXT,
+               intervals TEXT,
+               present_seconds REAL,
+               observed_seconds REAL)""",
+        """CREATE UNIQUE INDEX IF NOT EXISTS ux_presence_timeline_session
+               ON presence_timeline(student_id, subject_id, date, session_start)""",
+        "CREATE INDEX IF NOT EXISTS ix_presence_timeline_date_subject ON presence_timeline(date, subject_id)",
+    ],
+    # 5: Present/Absent counts per student x subject x month, kept current by
+    #    triggers, so dashboards read percentages without scanning attendance.
+    #    The triggers run inside the writer's transaction (finalize_attendance's upsert).
+    [
+        """CREATE TABLE IF NOT EXISTS attendance_monthly (
+               student_id INTEGER NOT NULL,
+               subject_id INTEGER NOT NULL,
+               month TEXT NOT NULL,
+               present INTEGER NOT NULL DEFAULT 0,
+               absent INTEGER NOT NULL DEFAULT 0,
+               PRIMARY KEY (student_id, subject_id, month))""",
+        "CREATE INDEX IF NOT EXISTS ix_attendance_monthly_subject ON attendance_monthly(subject_id, month)",
+        """INSERT OR REPLACE INTO attendance_monthly (student_id, subject_id, month, present, absent)
+           SELECT student_id, subject_id, substr(date, 1, 7),
+                  SUM(status = 'Present'), SUM(status IS NOT 'Present')
+           FROM attendance
+           WHERE student_id IS NOT NULL AND subject_id IS NOT NULL AND date IS NOT NULL
+           GROUP BY student_id, subject_id, substr(date, 1, 7)""",
+        """CREATE TRIGGER IF NOT EXISTS attendance_monthly_insert AFTER INSERT ON attendance
+           BEGIN
+               INSERT INTO attendance_monthly (student_id, subject_id, month, present, absent)
+               VALUES (NEW.student_id, NEW.subject_id, substr(NEW.date, 1, 7),
+                       NEW.status = 'Present', NEW.status IS NOT 'Present')
+               ON CONFLICT(student_id, subject_id, month) DO UPDATE SET
+                   present = present + excluded.present,
+                   absent = absent + excluded.absent;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS attendance_monthly_update
+           AFTER UPDATE OF student_id, subject_id, date, status ON attendance
+           BEGIN
+               UPDATE attendance_monthly SET
+                   present = present - (OLD.status = 'Present'),
+                   absent = absent - (OLD.status IS NOT 'Present')
+               WHERE student_id = OLD.student_id AND subject_id = OLD.subject_id
+                 AND month = substr(OLD.date, 1, 7);
+               INSERT INTO attendance_monthly (student_id, subject_id, month, present, absent)
+               VALUES (NEW.student_id, NEW.subject_id, substr(NEW.date, 1, 7),
+                       NEW.status = 'Present', NEW.status IS NOT 'Present')
+               ON CONFLICT(student_id, subject_id, month) DO UPDATE SET
+                   present = present + excluded.present,
+                   absent = absent + excluded.absent;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS attendance_monthly_delete AFTER DELETE ON attendance
+           BEGIN
+               UPDATE attendance_monthly SET
+                   present = present - (OLD.status = 'Present'),
+                   absent = absent - (OLD.status IS NOT 'Present')
+               WHERE student_id = OLD.student_id AND subject_id = OLD.subject_id
+                 AND month = substr(OLD.date, 1, 7);
+           END""",
+    ],
+    # 6: live_attendance rows stamped with the 'live_attendance' counter on
+    #    every write, so LiveFeed reads only the rows changed since its last read;
+    #    deletes bump a counter of their own, which makes LiveFeed reload
+    [
+        "ALTER TABLE live_attendance ADD COLUMN updated_seq INTEGER NOT NULL DEFAULT 0",
+        "CREATE INDEX IF NOT EXISTS ix_live_attendance_seq ON live_attendance(updated_seq)",
+        "INSERT OR IGNORE INTO change_counters (name, version) VALUES ('live_attendance', 0)",
+        "INSERT OR IGNORE INTO change_counters (name, version) VALUES ('live_attendance_deletes', 0)",
+        """CREATE TRIGGER IF NOT EXISTS live_attendance_insert_seq AFTER INSERT ON live_attendance
+           BEGIN
+               UPDATE change_counters SET version = version + 1 WHERE name = 'live_attendance';
+               UPDATE live_attendance SET updated_seq =
+                   (SELECT version FROM change_counters WHERE name = 'live_attendance')
+               WHERE rowid = NEW.rowid;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS live_attendance_update_seq
+           AFTER UPDATE OF student_id, name, face_entry, face_exit, duration, status ON live_attendance
+           BEGIN
+               UPDATE change_counters SET version = version + 1 WHERE name = 'live_attendance';
+               UPDATE live_attendance SET updated_seq =
+                   (SELECT version FROM change_counters WHERE name = 'live_attendance')
+               WHERE rowid = NEW.rowid;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS live_attendance_delete_counter AFTER DELETE ON live_attendance
+           BEGIN
+               UPDATE change_counters SET version = version + 1
+               WHERE name IN ('live_attendance', 'live_attendance_deletes');
+           END""",
+    ],
+]
+
+def change_version(conn, name):
+    """Current change counter for a table (see migrations 2 and 6)"""
+    row = conn.execute("SELECT version FROM change_counters WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else 0
+
+def migrate(conn):
+    """
+    Apply pending MIGRATIONS; returns the resulting schema version.
+
+    Each migration runs in its own BEGIN IMMEDIATE transaction with
+    sqlite3's implicit transaction handling switched off, so DDL such as
+    ALTER TABLE rolls back with the rest on failure. user_version is
+    re-read under the write lock, so processes upgrading at the same time
+    (web app, scheduler, workers) apply each migration exactly once.
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= len(MIGRATIONS):
+        return version
+
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    try:
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                if version < len(MIGRATIONS):
+                    for sql in MIGRATIONS[version]:
+                        conn.execute(sql)
+                    version += 1
+                    conn.execute(f"PRAGMA user_version = {version}")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            if version >= len(MIGRATIONS):
+                return version
+    finally:
+        conn.isolation_level = isolation_level
+
+# -------- CONNECTION POOL --------
+class PooledConnection:
+    """
+    A pooled connection handed out by ConnectionPool.checkout().
+
+    Behaves like the sqlite3 connection it wraps, except that close()
+    returns it to the pool instead of closing it.
+    """
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+        self.released = False
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        self._pool.release(self)
+
+class ConnectionPool:
+    """
+    Thread-safe pool of tuned connections for the Flask backend.
+
+    Reusing connections skips the connect + PRAGMA + schema parsing cost
+    on every request, and keeps each connection's prepared statement
+    cache (cached_statements) warm across requests.
+    """
+
+    def __init__(self, db_path=DB_PATH, max_size=8, timeout=10.0, row_factory=None,
+                 cached_statements=256):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.row_factory = row_factory
+        self.cached_statements = cached_statements
+
+        self._idle = []
+        self._cond = threading.Condition()
+        self._created = 0
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time = 0.0
+
+    def _open(self):
+        return connect(self.db_path, row_factory=self.row_factory, check_same_thread=False,
+                       cached_statements=self.cached_statements)
+
+    def checkout(self):
+        """Borrow a connection; blocks up to timeout when all max_size are in use"""
+        with self._cond:
+            if not self._idle and self._created >= self.max_size:
+                self.waits += 1
+                started = time.perf_counter()
+                ready = lambda: self._idle or self._created < self.max_size
+                if not self._cond.wait_for(ready, self.timeout):
+                    raise sqlite3.OperationalError("connection pool exhausted")
+                self.wait_time += time.perf_counter() - started
+
+            self.checkouts += 1
+            if self._idle:
+                conn = self._idle.pop()
+            else:
+                self._created += 1
+                conn = None
+
+        if conn is None:
+            try:
+                conn = self._open()
+            except Exception:
+                with self._cond:
+                    self._created -= 1
+                    self._cond.notify()
+                raise
+        return PooledConnection(self, conn)
+
+    def release(self, pooled):
+        """Return a connection, rolling back anything left uncommitted"""
+        if pooled.released:
+            return
+        pooled.released = True
+        conn = pooled._conn
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            conn = None
+
+        with self._cond:
+            if conn is None:
+                self._created -= 1
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "max_size": self.max_size,
+                "open": self._created,
+                "idle": len(self._idle),
+                "in_use": self._created - len(self._idle),
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "avg_wait_ms": round(self.wait_time / self.waits * 1000, 2) if self.waits else 0.0,
+            }
+
+# -------- LIVE FEED --------
+class LiveSubscriber:
+    """One listener of a LiveFeed; rows waiting for it are merged by student_id"""
+
+    def __init__(self):
+        self._pending = {}
+        self._reset = False
+        self._cond = threading.Condition()
+
+    def _push(self, rows, reset=False):
+        with self._cond:
+            if reset:
+                self._pending.clear()
+                self._reset = True
+            for row in rows:
+                self._pending[row["student_id"]] = row
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """
+        Wait up to timeout for changes. Returns (reset, rows): rows changed
+        since the last call, and whether they replace everything seen so far.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending or self._reset, timeout)
+            rows, reset = list(self._pending.values()), self._reset
+            self._pending.clear()
+            self._reset = False
+            return reset, rows
+
+class LiveFeed:
+    """
+    Single watcher of live_attendance shared by every monitor screen.
+
+    One thread polls PRAGMA data_version (no disk read) and, when another
+    connection has committed, the 'live_attendance' change counter. Only
+    then does it read the rows stamped since its last read (migration 6)
+    and hand them to every subscriber, so N screens cost one query per
+    change instead of N per poll. A slow subscriber never blocks the
+    others: its pending rows are merged, newest per student.
+    """
+
+    COLUMNS = "student_id, name, face_entry, face_exit, duration, status, updated_seq"
+
+    def __init__(self, db_path=DB_PATH, poll_interval=0.5):
+        self.db_path = db_path
+        self.poll_interval = poll_interval
+        self.rows = {}
+        self.reads = 0
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._seq = 0
+
+    def subscribe(self):
+        """Returns (snapshot, subscriber): every current row, then changes via subscriber.get()"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                # First use, or the watcher died: reload and bring existing screens up to date
+                conn = connect(self.db_path, row_factory=sqlite3.Row, check_same_thread=False)
+                self._load(conn)
+                for subscriber in self._subscribers:
+                    subscriber._push(self.rows.values(), reset=True)
+                self._thread = threading.Thread(target=self._watch, args=(conn,), name="live-feed", daemon=True)
+                self._thread.start()
+            subscriber = LiveSubscriber()
+            self._subscribers.add(subscriber)
+            return list(self.rows.values()), subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def stats(self):
+        with self._lock:
+            return {"subscribers": len(self._subscribers), "rows": len(self.rows),
+                    "reads": self.reads, "seq": self._seq}
+
+    def _load(self, conn):
+        """Full read, at start and after rows were deleted"""
+        deletes = change_version(conn, "live_attendance_deletes")
+        seq = change_version(conn, "live_attendance")
+        rows = {row["student_id"]: dict(row)
+                for row in conn.execute(f"SELECT {self.COLUMNS} FROM live_attendance")}
+        self._deletes, self._seq, self.rows = deletes, seq, rows
+        self.reads += 1
+
+    def _watch(self, conn):
+        """Poll for commits; a database error is logged and retried on a fresh connection"""
+        data_version = None
+        failing = False
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                if conn is None:
+                    conn = connect(self.db_path, row_factory=sqlite3.Row, check_same_thread=False)
+                latest = conn.execute("PRAGMA data_version").fetchone()[0]
+                if latest != data_version:
+                    data_version = latest
+                    self._refresh(conn)
+                if failing:
+                    print("[OK] Live feed recovered")
+                    failing = False
+            except sqlite3.Error as e:
+                if not failing:
+                    print(f"[!] Live feed: {e} - retrying")
+                    failing = True
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except sqlite3.Error:
+                        pass
+                conn = None
+                data_version = None
+
+    def _refresh(self, conn):
+        """Read what changed since the last read and push it to every subscriber"""
+        if change_version(conn, "live_attendance") <= self._seq:
+            return
+
+        with self._lock:
+            if change_version(conn, "live_attendance_deletes") != self._deletes:
+                self._load(conn)
+                for subscriber in self._subscribers:
+                    subscriber._push(self.rows.values(), reset=True)
+                return
+
+            changed = [dict(row) for row in conn.execute(
+                f"SELECT {self.COLUMNS} FROM live_attendance WHERE updated_seq > ?", (self._seq,))]
+            self.reads += 1
+            if not changed:
+                return
+            for row in changed:
+                self.rows[row["student_id"]] = row
+            self._seq = max(row["updated_seq"] for row in changed)
+            for subscriber in self._subscribers:
+                subscriber._push(changed)
@@ -0,0 +1,184 @@
+"""
+FACE GALLERY - Smart Attendance System
+======================================
+Loads the enrolled face embeddings from id_database/.
+
+Embedding every enrollment photo with DeepFace takes minutes once the
+gallery grows, so the embeddings are cached on disk:
+
+    embedding_cache/<model>_<detector>.npz    float32 matrix, one row per photo,
+                                              with each row's file name, mtime
+                                              and size in the same file
+
+Only new or changed photos are re-embedded; if nothing changed the cache
+is reused as-is. The cache is written to a unique temp file and swapped in
+with one os.replace, so a crash or two workers saving at once can never
+pair a matrix with another write's file list.
+
+A session can load just one class: load_class_roster() reads the
+students of users.class_id and load_gallery(roster=...) keeps only
+their photos.
+
+Can also run manually to warm the cache after adding photos:
+    python face_gallery.py
+"""
+
+import os
+import tempfile
+import zipfile
+from datetime import datetime
+
+import numpy as np
+
+import database
+
+# Configuration
+ID_DATABASE = "id_database"
+CACHE_DIR = "embedding_cache"
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+def log(message):
+    """Print with timestamp"""
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] {message}")
+
+def parse_filename(filename):
+    """Split 'ID_Name.png' into (id, name); 'Name.png' uses the name as id"""
+    parts = os.path.splitext(filename)[0].split('_')
+    sid = parts[0]
+    name = parts[1] if len(parts) > 1 else parts[0]
+    return sid, name
+
+def _cache_path(cache_dir, model_name, detector):
+    return os.path.join(cache_dir, f"{model_name}_{detector}.npz")
+
+def _file_key(img_path):
+    stat = os.stat(img_path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+def _read_cache(cache_dir, model_name, detector):
+    """Return ({filename: (key, row)}, matrix) or ({}, None) if missing/corrupt"""
+    try:
+        with np.load(_cache_path(cache_dir, model_name, detector), allow_pickle=False) as data:
+            if str(data["model"]) != model_name or str(data["detector"]) != detector:
+                return {}, None
+            files = data["files"].tolist()
+            keys = data["keys"].tolist()
+            matrix = data["matrix"]
+        if not len(files) == len(keys) == matrix.shape[0]:
+            return {}, None
+        entries = {f: (k, row) for row, (f, k) in enumerate(zip(files, keys))}
+        return entries, matrix
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        return {}, None
+
+def _write_cache(cache_dir, model_name, detector, files, keys, matrix):
+    """Write file list, keys and matrix as one file, swapped in with a single os.replace"""
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, model=np.array(model_name), detector=np.array(detector),
+                     files=np.array(files, dtype=str),
+                     keys=np.asarray(keys, dtype=np.int64).reshape(-1, 2),
+                     matrix=matrix)
+        os.replace(tmp_path, _cache_path(cache_dir, model_name, detector))
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def _embed_image(img_path, model_name, detector):
+    from deepface import DeepFace
+
+    results = DeepFace.represent(img_path=img_path, model_name=model_name,
+                                 detector_backend=detector, enforce_detection=False)
+    return np.asarray(results[0]["embedding"], dtype=np.float32)
+
+def load_class_roster(class_id):
+    """Return (ids, names) of the students enrolled in a class"""
+    conn = database.connect()
+    rows = conn.execute(
+        "SELECT id, name FROM users WHERE role = 'student' AND class_id = ?", (class_id,)
+    ).fetchall()
+    conn.close()
+    return {str(r[0]) for r in rows}, {r[1] for r in rows}
+
+def _in_roster(filename, roster):
+    """Match on student id; only 'Name.png' files, which have no id, match on the name"""
+    sid, name = parse_filename(filename)
+    ids, names = roster
+    if sid in ids:
+        return True
+    has_id = "_" in os.path.splitext(filename)[0]
+    return not has_id and name in names
+
+def load_gallery(model_name="ArcFace", detector="opencv", db_dir=ID_DATABASE, cache_dir=CACHE_DIR, roster=None,
+                 embed_image=None):
+    """
+    Load enrolled faces, re-embedding only photos that are new or changed.
+
+    roster is an optional (ids, names) pair from load_class_roster(); when
+    given only those students' photos are loaded. embed_image(path) replaces
+    DeepFace for new photos (the onnx backend); model_name and detector
+    then name its cache.
+
+    Returns (known_faces, embeddings): known_faces is a list of
+    {"name", "id", "file"} dicts and embeddings the matching float32
+    matrix with one row per person.
+    """
+    cached, cached_matrix = _read_cache(cache_dir, model_name, detector)
+
+    all_files = sorted(f for f in os.listdir(db_dir) if f.lower().endswith(IMAGE_EXTENSIONS))
+    files = [f for f in all_files if roster is None or _in_roster(f, roster)]
+    keys = [_file_key(os.path.join(db_dir, f)) for f in files]
+
+    rows = []
+    embedded = 0
+    for filename, key in zip(files, keys):
+        hit = cached.get(filename)
+        if hit is not None and hit[0] == key:
+            rows.append(cached_matrix[hit[1]])
+        else:
+            img_path = os.path.join(db_dir, filename)
+            if embed_image is not None:
+                rows.append(embed_image(img_path))
+            else:
+                rows.append(_embed_image(img_path, model_name, detector))
+            embedded += 1
+
+    unchanged = (embedded == 0 and cached_matrix is not None
+                 and len(files) == cached_matrix.shape[0]
+                 and all(cached[f][1] == i for i, f in enumerate(files)))
+
+    if unchanged:
+        embeddings = cached_matrix
+    elif embedded == 0 and roster is not None:
+        # Class subset fully cached: copy its rows, leave the campus cache alone
+        embeddings = np.vstack(rows).astype(np.float32) if rows else np.zeros((0, 0), np.float32)
+    else:
+        embeddings = np.vstack(rows).astype(np.float32) if rows else np.zeros((0, 0), np.float32)
+
+        # Keep cached photos outside this roster so the cache stays campus-wide
+        loaded = set(files)
+        others = [f for f in all_files if f not in loaded and f in cached]
+        cache_files = files + others
+        cache_keys = keys + [cached[f][0] for f in others]
+        cache_matrix = embeddings
+        if others:
+            cache_matrix = np.vstack([embeddings, cached_matrix[[cached[f][1] for f in others]]])
+
+        _write_cache(cache_dir, model_name, detector, cache_files, cache_keys, cache_matrix)
+
+    known_faces = []
+    for filename in files:
+        sid, name = parse_filename(filename)
+        known_faces.append({"name": name, "id": sid, "file": filename})
+
+    log(f"Gallery: {len(files)} faces ({embedded} embedded, {len(files) - embedded} from cache)")
+    return known_faces, embeddings
+
+if __name__ == "__main__":
+    load_gallery("ArcFace")
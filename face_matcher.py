@@ -0,0 +1,150 @@
+"""
+FACE MATCHER - Smart Attendance System
+======================================
+Matches live face embeddings against the enrolled gallery.
+
+The gallery is held as one L2-normalized float32 matrix, so every face
+in a frame is compared with every enrolled student in a single matrix
+multiply:
+
+    cosine distance = 1 - probes @ gallery.T
+
+Two backends are available through create_matcher():
+    exact   brute force over the whole gallery (default)
+    ivf     inverted-file index for campus-scale galleries, approximate
+
+Benchmark latency and recall:
+    python benchmarks/bench_matcher.py
+"""
+
+import numpy as np
+
+def normalize_rows(embeddings):
+    """Return a float32 copy of embeddings with every row scaled to unit length"""
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[np.newaxis, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def match_faces(gallery, probes, threshold):
+    """
+    Match every probe embedding against a normalized gallery matrix.
+
+    Returns (indices, distances): the best gallery row and its cosine
+    distance per probe. Rows farther than threshold get index -1.
+    """
+    if len(gallery) == 0 or len(probes) == 0:
+        return np.full(len(probes), -1, dtype=np.int64), np.ones(len(probes), dtype=np.float32)
+
+    probes = normalize_rows(probes)
+
+    distances = 1.0 - probes @ gallery.T
+    indices = np.argmin(distances, axis=1)
+    best = distances[np.arange(len(probes)), indices]
+    indices[best > threshold] = -1
+    return indices, best
+
+# -------- MATCHER BACKENDS --------
+class ExactMatcher:
+    """Brute-force matching against every enrolled face"""
+
+    def __init__(self, embeddings):
+        self.gallery = normalize_rows(embeddings) if len(embeddings) else np.zeros((0, 0), np.float32)
+
+    def match(self, probes, threshold):
+        return match_faces(self.gallery, probes, threshold)
+
+class IVFMatcher:
+    """
+    Approximate matching with an inverted-file index.
+
+    The gallery is clustered with spherical k-means into n_lists cells.
+    Each probe is compared only with the faces in its n_probe closest
+    cells, so raising n_probe trades speed for recall (n_probe equal to
+    n_lists gives exact results).
+    """
+
+    def __init__(self, embeddings, n_lists=None, n_probe=8, iterations=10, seed=0):
+        gallery = normalize_rows(embeddings) if len(embeddings) else np.zeros((0, 0), np.float32)
+        count = len(gallery)
+        self.count = count
+        if n_lists is None:
+            n_lists = max(1, int(np.sqrt(count)))
+        self.n_lists = max(1, min(n_lists, count))
+        self.n_probe = max(1, min(n_probe, self.n_lists))
+
+        if count == 0:
+            self.centroids = np.zeros((0, 0), np.float32)
+            self.cells = gallery
+            return
+
+        self.centroids = self._train(gallery, iterations, seed)
+        # Store the gallery grouped by cell so each inverted list is a contiguous slice
+        assignment = self._assign(gallery)
+        self.order = np.argsort(assignment, kind="stable")
+        self.cells = gallery[self.order]
+        self.bounds = np.searchsorted(assignment[self.order], np.arange(self.n_lists + 1))
+
+    def _train(self, gallery, iterations, seed):
+        rng = np.random.default_rng(seed)
+        sample_size = min(len(gallery), 64 * self.n_lists)
+        sample = gallery[rng.choice(len(gallery), sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, self.n_lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            empty = ~sums.any(axis=1)
+            # Re-seed empty cells with random sample points
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            centroids = normalize_rows(sums)
+        return centroids
+
+    def _assign(self, vectors, chunk=8192):
+        parts = [np.argmax(vectors[i:i + chunk] @ self.centroids.T, axis=1)
+                 for i in range(0, len(vectors), chunk)]
+        return np.concatenate(parts)
+
+    def match(self, probes, threshold):
+        if self.count == 0 or len(probes) == 0:
+            return match_faces(self.cells, probes, threshold)
+
+        probes = normalize_rows(probes)
+        cell_scores = probes @ self.centroids.T
+        if self.n_probe < self.n_lists:
+            cells = np.argpartition(-cell_scores, self.n_probe - 1, axis=1)[:, :self.n_probe]
+        else:
+            cells = np.broadcast_to(np.arange(self.n_lists), cell_scores.shape)
+
+        rows = np.full(len(probes), -1, dtype=np.int64)
+        best = np.ones(len(probes), dtype=np.float32)
+        # One matrix product per visited cell, covering every probe that selected it
+        for cell in np.unique(cells):
+            lo, hi = self.bounds[cell], self.bounds[cell + 1]
+            if lo == hi:
+                continue
+            which = np.flatnonzero((cells == cell).any(axis=1))
+            distances = 1.0 - probes[which] @ self.cells[lo:hi].T
+            j = np.argmin(distances, axis=1)
+            found = distances[np.arange(len(which)), j]
+            better = found < best[which]
+            best[which[better]] = found[better]
+            rows[which[better]] = lo + j[better]
+
+        indices = np.where(rows >= 0, self.order[rows], -1)
+        indices[best > threshold] = -1
+        return indices, best
+
+MATCHERS = {
+    "exact": ExactMatcher,
+    "ivf": IVFMatcher,
+}
+
+def create_matcher(embeddings, backend="exact", **options):
+    """Build a matcher by name ("exact" or "ivf"); options go to its constructor"""
+    if backend not in MATCHERS:
+        raise ValueError(f"Unknown matcher backend: {backend}")
+    return MATCHERS[backend](embeddings, **options)
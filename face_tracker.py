@@ -0,0 +1,161 @@
+"""
+FACE TRACKER - Smart Attendance System
+======================================
+Follows faces between checks so ArcFace does not re-embed students who
+have not moved.
+
+Every check the detector still finds all faces (cheap), and each box is
+linked to a track from the previous check by IoU, or by centroid distance
+when the box shifted too far for IoU. A track keeps its identity, and is
+only re-embedded when:
+
+    it is new                       nothing is known about it yet
+    it is unknown or uncertain      no match, or distance near the threshold
+    detector confidence dropped     occlusion, head turned, blur
+    refresh_every checks passed     periodic re-confirmation
+
+So embedding cost follows new and uncertain faces, not class size.
+
+Usage (per check):
+    tracks, stale = tracker.update(boxes, confidences)
+    ...embed faces at `stale`, match them...
+    for i, match, distance in ...: tracker.assign(tracks[i], match, distance)
+"""
+
+class Track:
+    """One face followed across checks"""
+
+    def __init__(self, track_id, box, confidence):
+        self.id = track_id
+        self.box = box
+        self.confidence = confidence
+        self.match = -1
+        self.distance = 1.0
+        self.embedded_confidence = 0.0
+        self.since_embed = None
+        self.misses = 0
+
+def iou(a, b):
+    """Intersection over union of two (x, y, w, h) boxes"""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = min(ax + aw, bx + bw) - max(ax, bx)
+    ih = min(ay + ah, by + bh) - max(ay, by)
+    if iw <= 0 or ih <= 0:
+        return 0.0
+    inter = iw * ih
+    return inter / (aw * ah + bw * bh - inter)
+
+def centroid_distance(a, b):
+    """Distance between box centres, in units of the first box's width"""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    dx = (ax + aw / 2) - (bx + bw / 2)
+    dy = (ay + ah / 2) - (by + bh / 2)
+    return (dx * dx + dy * dy) ** 0.5 / max(aw, 1)
+
+class FaceTracker:
+    """
+    Greedy IoU / centroid tracker over detector boxes.
+
+    threshold is the matcher's distance threshold; a track whose last
+    distance is within uncertain_margin of it counts as uncertain.
+    """
+
+    def __init__(self, threshold, iou_threshold=0.3, max_centroid_shift=0.5, max_misses=2,
+                 refresh_every=10, uncertain_margin=0.1, confidence_drop=0.15):
+        self.threshold = threshold
+        self.iou_threshold = iou_threshold
+        self.max_centroid_shift = max_centroid_shift
+        self.max_misses = max_misses
+        self.refresh_every = refresh_every
+        self.uncertain_margin = uncertain_margin
+        self.confidence_drop = confidence_drop
+
+        self.tracks = []
+        self._next_id = 1
+        self.embedded = 0
+        self.reused = 0
+
+    def _link(self, boxes):
+        """Greedily pair existing tracks with new boxes, best overlap first"""
+        pairs = []
+        for t, track in enumerate(self.tracks):
+            for d, box in enumerate(boxes):
+                overlap = iou(track.box, box)
+                if overlap >= self.iou_threshold:
+                    pairs.append((1.0 + overlap, t, d))
+                else:
+                    shift = centroid_distance(track.box, box)
+                    if shift <= self.max_centroid_shift:
+                        pairs.append((1.0 - shift, t, d))
+        pairs.sort(reverse=True)
+
+        links, used_tracks, used_boxes = {}, set(), set()
+        for _, t, d in pairs:
+            if t in used_tracks or d in used_boxes:
+                continue
+            links[d] = self.tracks[t]
+            used_tracks.add(t)
+            used_boxes.add(d)
+        return links
+
+    def _needs_embedding(self, track):
+        if track.since_embed is None or track.match < 0:
+            return True
+        if track.distance > self.threshold - self.uncertain_margin:
+            return True
+        if track.confidence < track.embedded_confidence - self.confidence_drop:
+            return True
+        return track.since_embed >= self.refresh_every
+
+    def update(self, boxes, confidences):
+        """
+        Link this check's detections to tracks.
+
+        Returns (tracks, stale): one Track per box, and the indices of the
+        boxes whose faces must be embedded and passed to assign().
+        """
+        links = self._link(boxes)
+
+        tracks, stale = [], []
+        for d, (box, confidence) in enumerate(zip(boxes, confidences)):
+            track = links.get(d)
+            if track is None:
+                track = Track(self._next_id, box, confidence)
+                self._next_id += 1
+                self.tracks.append(track)
+            else:
+                track.box = box
+                track.confidence = confidence
+                track.misses = 0
+                if track.since_embed is not None:
+                    track.since_embed += 1
+
+            tracks.append(track)
+            if self._needs_embedding(track):
+                stale.append(d)
+            else:
+                self.reused += 1
+
+        # Forget tracks that were not seen for max_misses checks
+        seen = {track.id for track in tracks}
+        for track in self.tracks:
+            if track.id not in seen:
+                track.misses += 1
+        self.tracks = [t for t in self.tracks if t.misses <= self.max_misses]
+
+        return tracks, stale
+
+    def assign(self, track, match, distance):
+        """Record a fresh embedding result for a track"""
+        track.match = int(match)
+        track.distance = float(distance)
+        track.embedded_confidence = track.confidence
+        track.since_embed = 0
+        self.embedded += 1
+
+    def summary(self):
+        total = self.embedded + self.reused
+        saved = self.reused / total * 100 if total else 0.0
+        return f"tracker: {self.embedded} faces embedded, {self.reused} reused ({saved:.0f}% saved)"
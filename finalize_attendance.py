@@ -14,11 +14,11 @@ Can also run manually:
 """
 
 import sqlite3
-import os
-from datetime import datetime
+from datetime import datetime, timedelta
+
+import database
 
 # Configuration
-DB_PATH = os.path.join(os.path.dirname(__file__), "database.db")
 MIN_DURATION = 30  # Minimum minutes required for "Present" status
 
 def log(message):
@@ -29,11 +29,14 @@ def log(message):
 def finalize_attendance(subject_id=None):
     """Merge RFID + Face data and update attendance table"""
     
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    conn = database.connect(row_factory=sqlite3.Row)
+    # The attendance upsert needs the unique key from migration 1
+    database.migrate(conn)
     cursor = conn.cursor()
     
     today = datetime.now().strftime("%Y-%m-%d")
+    # Range on the raw timestamp instead of DATE(timestamp) so the index is used
+    tomorrow = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
     
     log("=" * 50)
     log("FINALIZING ATTENDANCE")
@@ -41,92 +44,63 @@ def finalize_attendance(subject_id=None):
     log(f"Minimum duration: {MIN_DURATION} minutes")
     log("=" * 50)
     
-    # Get students who tapped RFID today
-    if subject_id:
-        cursor.execute("""
-            SELECT DISTINCT student_id FROM rfid_logs
-            WHERE DATE(timestamp) = ? AND subject_id = ?
-        """, (today, subject_id))
-    else:
-        cursor.execute("""
+    # One join merges face durations with RFID taps for every student at once.
+    # The latest face_logs row per student + subject wins (bare column with MAX(id)).
+    subject_filter = "AND subject_id = :subject_id" if subject_id else ""
+    cursor.execute(f"""
+        WITH face AS (
+            SELECT student_id, subject_id, duration, MAX(id)
+            FROM face_logs
+            WHERE date = :today {subject_filter}
+            GROUP BY student_id, subject_id
+        ),
+        rfid AS (
             SELECT DISTINCT student_id FROM rfid_logs
-            WHERE DATE(timestamp) = ?
-        """, (today,))
-    
-    rfid_students = {row["student_id"] for row in cursor.fetchall()}
-    log(f"RFID entries found: {len(rfid_students)} students")
+            WHERE timestamp >= :today AND timestamp < :tomorrow {subject_filter}
+        )
+        SELECT face.student_id, face.subject_id,
+               COALESCE(face.duration, 0) AS duration,
+               COALESCE(users.name, 'ID:' || face.student_id) AS student_name,
+               rfid.student_id IS NOT NULL AS rfid_verified,
+               CASE WHEN rfid.student_id IS NOT NULL AND COALESCE(face.duration, 0) >= :min_duration
+                    THEN 'Present' ELSE 'Absent' END AS status
+        FROM face
+        LEFT JOIN rfid ON rfid.student_id = face.student_id
+        LEFT JOIN users ON users.id = face.student_id
+    """, {"today": today, "tomorrow": tomorrow, "subject_id": subject_id, "min_duration": MIN_DURATION})
     
-    # Get face duration data
-    if subject_id:
-        cursor.execute("""
-            SELECT student_id, subject_id, duration FROM face_logs
-            WHERE date = ? AND subject_id = ?
-        """, (today, subject_id))
-    else:
-        cursor.execute("""
-            SELECT student_id, subject_id, duration FROM face_logs
-            WHERE date = ?
-        """, (today,))
+    results = cursor.fetchall()
+    log(f"Face records found: {len(results)} students")
     
-    face_data = cursor.fetchall()
-    log(f"Face records found: {len(face_data)} entries")
-    
-    # Process each face record
     present_count = 0
     absent_count = 0
     
-    for row in face_data:
-        student_id = row["student_id"]
-        subj_id = row["subject_id"]
-        duration = row["duration"] or 0
-        
-        # Get student name for logging
-        cursor.execute("SELECT name FROM users WHERE id = ?", (student_id,))
-        student = cursor.fetchone()
-        student_name = student["name"] if student else f"ID:{student_id}"
-        
-        # Determine status
-        rfid_verified = student_id in rfid_students
-        duration_ok = duration >= MIN_DURATION
-        
-        if rfid_verified and duration_ok:
-            status = "Present"
+    for row in results:
+        duration = row["duration"]
+        if row["status"] == "Present":
             present_count += 1
-            log(f"  [OK] {student_name}: RFID ✓ + Face {duration:.1f}min ✓ → PRESENT")
+            log(f"  [OK] {row['student_name']}: RFID ✓ + Face {duration:.1f}min ✓ → PRESENT")
         else:
-            status = "Absent"
             absent_count += 1
             reason = []
-            if not rfid_verified:
+            if not row["rfid_verified"]:
                 reason.append("No RFID")
-            if not duration_ok:
+            if duration < MIN_DURATION:
                 reason.append(f"Face {duration:.1f}min < {MIN_DURATION}min")
-            log(f"  [!] {student_name}: {', '.join(reason)} → ABSENT")
-        
-        # Check if attendance record already exists
-        cursor.execute("""
-            SELECT id FROM attendance 
-            WHERE student_id = ? AND subject_id = ? AND date = ?
-        """, (student_id, subj_id, today))
-        
-        existing = cursor.fetchone()
-        
-        if existing:
-            cursor.execute("""
-                UPDATE attendance SET status = ?
-                WHERE student_id = ? AND subject_id = ? AND date = ?
-            """, (status, student_id, subj_id, today))
-        else:
-            cursor.execute("""
-                INSERT INTO attendance (student_id, subject_id, date, status)
-                VALUES (?, ?, ?, ?)
-            """, (student_id, subj_id, today, status))
+            log(f"  [!] {row['student_name']}: {', '.join(reason)} → ABSENT")
     
-    # Clear temporary logs for this session
-    if subject_id:
-        cursor.execute("DELETE FROM face_logs WHERE subject_id = ? AND date = ?", (subject_id, today))
+    # Write every status and clear this session's temporary logs in one transaction.
+    # The attendance_monthly counts follow through triggers (migration 5) in the same transaction.
+    with conn:
+        cursor.executemany("""
+            INSERT INTO attendance (student_id, subject_id, date, status)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(student_id, subject_id, date) DO UPDATE SET status = excluded.status
+        """, [(r["student_id"], r["subject_id"], today, r["status"]) for r in results])
+        
+        if subject_id:
+            cursor.execute("DELETE FROM face_logs WHERE subject_id = ? AND date = ?", (subject_id, today))
     
-    conn.commit()
     conn.close()
     
     log("-" * 50)
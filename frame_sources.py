@@ -0,0 +1,250 @@
+"""
+FRAME SOURCES - Smart Attendance System
+=======================================
+Where the recognition pipeline gets its frames from. Every source has the
+same read() / release() interface as cv2.VideoCapture, so CaptureThread
+does not care which one it is reading:
+
+    CameraSource     webcam index, or rtsp:// / http:// stream URL
+    VideoFileSource  recorded footage (.mp4, .avi, ...)
+    ImageDirSource   a folder of still frames, played in name order
+
+Recorded sources are paced to their frame rate times `speed`, so footage
+plays back like a live camera (speed=1), faster than real time (speed=4),
+or as fast as frames can be decoded (speed=0, for benchmarks).
+
+open_source() picks the right class from a camera setting. A recording
+can also be served as a local MJPEG stream, standing in for an RTSP
+classroom camera:
+
+    python frame_sources.py serve recordings/class.mp4 --port 8554 --loop
+    python live_recognition.py --camera http://127.0.0.1:8554/stream.mjpg --headless
+"""
+
+import argparse
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+from pipeline import LatestFrame
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+DEFAULT_FPS = 30.0
+
+class FrameSource:
+    """Base class: read() → (ok, frame), release()"""
+
+    # Live sources (cameras, streams) cannot be paced or replayed
+    is_live = False
+    fps = DEFAULT_FPS
+    speed = 1.0
+
+    def read(self):
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+class CameraSource(FrameSource):
+    """Webcam or network stream, read through cv2.VideoCapture"""
+
+    is_live = True
+
+    def __init__(self, source):
+        self.source = source
+        self.cap = cv2.VideoCapture(source)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS
+
+    def read(self):
+        return self.cap.read()
+
+    def release(self):
+        self.cap.release()
+
+class _RecordedSource(FrameSource):
+    """Pacing and position bookkeeping shared by recorded sources"""
+
+    def __init__(self, fps, speed, loop):
+        self.fps = fps
+        self.speed = speed
+        self.loop = loop
+        self.frames = 0
+        self._started = None
+
+    @property
+    def position(self):
+        """Seconds of footage delivered so far"""
+        return self.frames / self.fps
+
+    def _pace(self):
+        """Sleep until the current frame is due at fps × speed"""
+        if self._started is None:
+            self._started = time.perf_counter()
+        if self.speed > 0:
+            due = self._started + self.frames / (self.fps * self.speed)
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        self.frames += 1
+
+class VideoFileSource(_RecordedSource):
+    """Recorded footage, paced to its own frame rate × speed"""
+
+    def __init__(self, path, speed=1.0, loop=False):
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise IOError(f"Cannot open video: {path}")
+        super().__init__(self.cap.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS, speed, loop)
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    def read(self):
+        ok, frame = self.cap.read()
+        if not ok and self.loop and self.frames:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self.cap.read()
+        if ok:
+            self._pace()
+        return ok, frame
+
+    def release(self):
+        self.cap.release()
+
+class ImageDirSource(_RecordedSource):
+    """Still images from a folder in name order, shown at fps × speed"""
+
+    def __init__(self, path, fps=1.0, speed=1.0, loop=False):
+        self.path = path
+        self.files = sorted(os.path.join(path, f) for f in os.listdir(path)
+                            if f.lower().endswith(IMAGE_EXTENSIONS))
+        if not self.files:
+            raise IOError(f"No images in: {path}")
+        super().__init__(fps, speed, loop)
+        self.frame_count = len(self.files)
+
+    def read(self):
+        index = self.frames
+        if index >= len(self.files):
+            if not self.loop:
+                return False, None
+            index %= len(self.files)
+
+        frame = cv2.imread(self.files[index])
+        if frame is None:
+            return False, None
+        self._pace()
+        return True, frame
+
+def open_source(camera, speed=1.0, loop=False, image_fps=1.0):
+    """
+    Frame source for a camera setting: a device index, a stream URL, a video
+    file or an image folder. FrameSource objects are returned unchanged.
+    """
+    if isinstance(camera, FrameSource):
+        return camera
+    if isinstance(camera, int) or str(camera).isdigit():
+        return CameraSource(int(camera))
+    if "://" in camera:
+        return CameraSource(camera)
+    if os.path.isdir(camera):
+        return ImageDirSource(camera, fps=image_fps, speed=speed, loop=loop)
+    return VideoFileSource(camera, speed=speed, loop=loop)
+
+# -------- LOCAL STREAM (RTSP STAND-IN) --------
+class StreamServer:
+    """
+    Serves a frame source as MJPEG over HTTP on localhost.
+
+    One reader thread plays the source into a LatestFrame; every client
+    gets the newest frame, like viewers of a real network camera.
+    """
+
+    def __init__(self, source, port=8554, quality=85):
+        self.source = source
+        self.port = port
+        self.quality = quality
+        self.latest = LatestFrame()
+        self.stop_event = threading.Event()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/stream.mjpg":
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=frame")
+                self.end_headers()
+                seq = 0
+                try:
+                    while not server.stop_event.is_set():
+                        seq, frame = server.latest.get(after=seq, timeout=1.0)
+                        if frame is None:
+                            continue
+                        ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, server.quality])
+                        if not ok:
+                            continue
+                        self.wfile.write(b"--frame\r\nContent-Type: image/jpeg\r\n")
+                        self.wfile.write(f"Content-Length: {len(jpeg)}\r\n\r\n".encode())
+                        self.wfile.write(jpeg.tobytes())
+                        self.wfile.write(b"\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}/stream.mjpg"
+
+    def _play(self):
+        while not self.stop_event.is_set():
+            ok, frame = self.source.read()
+            if not ok:
+                break
+            self.latest.put(frame)
+        self.stop_event.set()
+        self.httpd.shutdown()
+
+    def serve_forever(self):
+        threading.Thread(target=self._play, name="stream-reader", daemon=True).start()
+        self.httpd.serve_forever()
+        self.source.release()
+
+    def stop(self):
+        self.stop_event.set()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a recording as a local MJPEG camera stream")
+    parser.add_argument("command", choices=["serve"])
+    parser.add_argument("source", help="video file or image folder")
+    parser.add_argument("--port", type=int, default=8554)
+    parser.add_argument("--speed", type=float, default=1.0, help="playback speed (1 = real time)")
+    parser.add_argument("--fps", type=float, default=1.0, help="frame rate for image folders")
+    parser.add_argument("--loop", action="store_true", help="restart the recording when it ends")
+    args = parser.parse_args()
+
+    server = StreamServer(open_source(args.source, speed=args.speed or 1.0, loop=args.loop, image_fps=args.fps),
+                          port=args.port)
+    print(f"Streaming {args.source} at {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -1,274 +1,621 @@
 import cv2
 import numpy as np
-import os
 import time
-import sys
-from deepface import DeepFace
+import argparse
+import traceback
 from datetime import datetime
 import openpyxl
-import tkinter as tk
-from threading import Thread
-import sqlite3
-
-# -------- SUBJECT ID FROM SCHEDULER --------
-# When called from auto_scheduler.py, subject_id is passed as argument
-SUBJECT_ID = int(sys.argv[1]) if len(sys.argv) > 1 else None
+from threading import Thread, Event
+import database
+from face_gallery import load_gallery, load_class_roster
+from face_matcher import create_matcher
+from face_tracker import FaceTracker
+from presence import PresenceTimeline, SessionResult
+import onnx_backend
+from finalize_attendance import finalize_attendance
+from frame_sources import open_source
+from pipeline import AdaptiveInterval, CaptureThread, DropOldestQueue, LatestFrame, StageStats
+
+# -------- MODELS --------
+MODEL_NAME = "ArcFace"
+DETECTOR = "yunet"
+# Most aligned faces sent through ArcFace in one forward pass
+EMBED_BATCH_SIZE = 32
+# "deepface" (TensorFlow) or "onnx" (ONNX Runtime, no TensorFlow; see onnx_backend.py)
+INFERENCE_BACKEND = "deepface"
 
 # -------- GLOBAL CONTROL --------
 running = False
+_onnx_models = None
+
+def load_deepface():
+    """Import DeepFace, and with it TensorFlow, only when the deepface backend runs"""
+    from deepface import DeepFace
+    return DeepFace
+
+def onnx_models():
+    """(YuNet detector, ArcFace session) for the onnx backend, created once"""
+    global _onnx_models
+    if _onnx_models is None:
+        _onnx_models = (onnx_backend.YuNetDetector(), onnx_backend.ArcFaceOnnx())
+    return _onnx_models
+
+def warm_up():
+    """Build ArcFace and the detector now so the first session starts instantly"""
+    if INFERENCE_BACKEND == "onnx":
+        onnx_models()[0].detect_faces(np.zeros((160, 160, 3), dtype=np.uint8))
+    else:
+        DeepFace = load_deepface()
+        DeepFace.build_model(MODEL_NAME)
+        DeepFace.represent(img_path=np.zeros((160, 160, 3), dtype=np.uint8), model_name=MODEL_NAME,
+                           detector_backend=DETECTOR, enforce_detection=False)
+    embed_faces([{"face": np.zeros((112, 112, 3), dtype=np.float32)}])
+
+def parse_camera_source(value):
+    """Device index ("0") or stream URL / video file / image folder"""
+    value = str(value)
+    return int(value) if value.isdigit() else value
+
+def detect_faces(frame):
+    """
+    Find and align every face in a frame (the detector runs at half resolution).
+
+    Each face has "face" (aligned crop), "confidence" and "box" (x, y, w, h
+    in full-frame coordinates).
+    """
+    small_frame = cv2.resize(frame, (0, 0), fx=0.5, fy=0.5)
+    if INFERENCE_BACKEND == "onnx":
+        faces = onnx_models()[0].detect_faces(small_frame)
+    else:
+        faces = load_deepface().extract_faces(
+            img_path=small_frame,
+            detector_backend=DETECTOR,
+            enforce_detection=False,
+            align=True
+        )
+        # With enforce_detection off, "no face" comes back as the whole frame at confidence 0
+        faces = [face for face in faces if face["confidence"] > 0]
+    for face in faces:
+        area = face["facial_area"]
+        face["box"] = [v * 2 for v in (area['x'], area['y'], area['w'], area['h'])]
+    return faces
+
+def prepare_crop(face, target_size):
+    """
+    Aligned crop from extract_faces (RGB, 0-1) → ArcFace input (BGR, 0-1),
+    resized keeping aspect ratio and zero-padded, as DeepFace.represent does.
+    """
+    img = face[:, :, ::-1]
+    height, width = target_size
+    factor = min(height / img.shape[0], width / img.shape[1])
+    img = cv2.resize(img, (max(1, int(img.shape[1] * factor)), max(1, int(img.shape[0] * factor))))
+
+    pad_h = height - img.shape[0]
+    pad_w = width - img.shape[1]
+    img = np.pad(img, ((pad_h // 2, pad_h - pad_h // 2), (pad_w // 2, pad_w - pad_w // 2), (0, 0)), "constant")
+    if img.shape[:2] != (height, width):
+        img = cv2.resize(img, (width, height))
+    return img.astype(np.float32)
+
+def embed_faces(faces, batch_size=EMBED_BATCH_SIZE):
+    """
+    ArcFace embeddings for faces from detect_faces().
+
+    Detection already happened, so the crops go straight to the model as
+    batches of up to batch_size instead of one DeepFace.represent call each.
+    """
+    if not faces:
+        return []
+
+    if INFERENCE_BACKEND == "onnx":
+        model = onnx_models()[1]
+        forward = model.embed
+    else:
+        model = load_deepface().build_model(MODEL_NAME)
+        forward = model.model.predict_on_batch
+
+    embeddings = []
+    for i in range(0, len(faces), batch_size):
+        batch = np.stack([prepare_crop(face["face"], model.input_shape) for face in faces[i:i + batch_size]])
+        embeddings.extend(np.asarray(forward(batch)))
+    return embeddings
+
+def embed_image_onnx(img_path):
+    """Enrollment photo → embedding with the onnx backend (most confident face)"""
+    image = cv2.imread(img_path)
+    faces = onnx_models()[0].detect_faces(image)
+    if faces:
+        face = max(faces, key=lambda f: f["confidence"])
+    else:
+        face = {"face": image[:, :, ::-1].astype(np.float32) / 255}
+    return np.asarray(embed_faces([face])[0], dtype=np.float32)
+
+def gallery_options():
+    """load_gallery() arguments for the active backend; each keeps its own cache"""
+    if INFERENCE_BACKEND == "onnx":
+        return {"model_name": onnx_backend.cache_name(), "detector": "yunet", "embed_image": embed_image_onnx}
+    return {"model_name": MODEL_NAME}
 
 # -------- FACE ATTENDANCE --------
-def run_attendance():
+def run_attendance(subject_id=None, class_id=None, camera_source=0, session_state=None,
+                   headless=False, duration_min=None, replay_speed=1.0):
+    """
+    Record one class session until its duration ends or running is cleared.
+
+    session_state, if given, is a dict whose "state" is updated as the
+    session goes loading → running → saving → finished.
+
+    headless skips the preview window and all box drawing; duration_min
+    overrides the 60-minute class length. camera_source may also be a
+    video file or image folder (see frame_sources.py), played back at
+    replay_speed; the session then ends with the recording.
+    """
     global running
 
+    if session_state is None:
+        session_state = {}
+    session_state["state"] = "loading"
+    session_state["failed_checks"] = 0
+
     DB_PATH = "id_database"
     THRESHOLD = 0.50
-    MODEL_NAME = "ArcFace"
-    DETECTOR = "yunet"
 
-    CLASS_DURATION_MIN = 60
-    REQUIRED_PRESENT_MIN = 50
-    CHECK_INTERVAL = 1
+    CLASS_DURATION_MIN = duration_min or 60
+    # 50 of 60 minutes, scaled to the session length
+    REQUIRED_PRESENT_MIN = CLASS_DURATION_MIN * 50 / 60
+
+    # Seconds between checks, adapted within these bounds (see AdaptiveInterval):
+    # fastest while students arrive, slowest once the whole roster is identified
+    MIN_CHECK_INTERVAL = 0.5
+    MAX_CHECK_INTERVAL = 5
+
+    # Pipeline: pending live_attendance updates kept before the oldest are dropped,
+    # seconds between live_attendance flushes (one transaction each),
+    # and seconds between per-stage throughput printouts
+    WRITE_QUEUE_SIZE = 5000
+    LIVE_FLUSH_INTERVAL = 2
+    STATS_INTERVAL = 60
+    # A failing check is logged at most this often (the rest are counted)
+    ERROR_LOG_INTERVAL = 30
+
+    # "exact" brute force, or "ivf" approximate index for very large galleries
+    MATCHER_BACKEND = "exact"
+    MATCHER_OPTIONS = {}
+
+    # Also match faces unknown to the class against the whole campus
+    CAMPUS_FALLBACK = False
+
+    # Tracked faces with a confident match are re-embedded every N checks
+    TRACK_REFRESH_EVERY = 10
 
     now = datetime.now()
     session_date = str(now.date())
     session_hour = now.strftime("%H-00")
-    EXCEL_FILE = f"attendance_{session_date}_{session_hour}.xlsx"
+    # Class id in the name: several rooms can record during the same hour
+    class_tag = f"_class{class_id}" if class_id else ""
+    EXCEL_FILE = f"attendance_{session_date}_{session_hour}{class_tag}.xlsx"
+
+    print("Loading face database...")
 
-    known_faces = []
-    presence_counter = {}
+    # Only the running class's students when the scheduler passes class_id
+    roster = load_class_roster(class_id) if class_id else None
+    known_faces, embeddings = load_gallery(db_dir=DB_PATH, roster=roster, **gallery_options())
+    # Per-student state is keyed by student id: two students (or a guest)
+    # may share a name
+    students = {}
     first_seen_time = {}
     last_seen_time = {}
     total_checks = 0
+    # Intervals each student was seen (see presence.py), and seconds of session observed
+    timelines = {}
+    observed_time = 0.0
 
-    print("Loading face database...")
-
-    for filename in os.listdir(DB_PATH):
-        if filename.lower().endswith((".png", ".jpg", ".jpeg")):
-            img_path = os.path.join(DB_PATH, filename)
-            parts = os.path.splitext(filename)[0].split('_')
-            sid = parts[0]
-            name = parts[1] if len(parts) > 1 else parts[0]
-
-            results = DeepFace.represent(img_path=img_path, model_name=MODEL_NAME, enforce_detection=False)
-            known_faces.append({"name": name, "id": sid, "embedding": results[0]["embedding"]})
-            presence_counter[name] = 0
-            first_seen_time[name] = None
-            last_seen_time[name] = None
-
-    def get_distance(v1, v2):
-        return 1 - (np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2)))
-
-    cap = cv2.VideoCapture(0)
+    for person in known_faces:
+        sid = person["id"]
+        students[sid] = person["name"]
+        timelines[sid] = PresenceTimeline()
+        first_seen_time[sid] = None
+        last_seen_time[sid] = None
+
+    # Pre-normalized gallery: all faces in a frame are matched in one call
+    matcher = create_matcher(embeddings, MATCHER_BACKEND, **MATCHER_OPTIONS)
+
+    campus_faces, campus_matcher = [], None
+    if roster is not None and CAMPUS_FALLBACK:
+        campus_faces, campus_embeddings = load_gallery(db_dir=DB_PATH, **gallery_options())
+        campus_matcher = create_matcher(campus_embeddings, MATCHER_BACKEND, **MATCHER_OPTIONS)
+    known_index = {person["id"]: i for i, person in enumerate(known_faces)}
+
+    # Follows faces between checks so only new or uncertain ones are embedded
+    tracker = FaceTracker(THRESHOLD, refresh_every=TRACK_REFRESH_EVERY)
+
+    cap = open_source(camera_source, speed=replay_speed)
+    # Recordings replayed faster than real time keep the same checks per second of footage
+    replay_scale = 1.0
+    if not cap.is_live and cap.speed > 0:
+        replay_scale = 1.0 / cap.speed
+    sampler = AdaptiveInterval(MIN_CHECK_INTERVAL, MAX_CHECK_INTERVAL, scale=replay_scale)
+    # Roster students found so far, to sample faster until everyone has arrived
+    expected = len(known_faces) if roster is not None else None
+    identified = 0
     start_time = time.time()
-    last_check_time = 0
 
-    print("Attendance session started...")
+    def session_clock():
+        """
+        Seconds into the session: wall clock for cameras, footage time for
+        recordings, so a replay at any speed credits the time it covers
+        """
+        return time.time() - start_time if cap.is_live else cap.position
 
-    # Database connection for live updates
-    conn = sqlite3.connect("database.db", check_same_thread=False)
-    cursor = conn.cursor()
-
-    while running:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        # Stop after class duration
-        if (time.time() - start_time) / 60 >= CLASS_DURATION_MIN:
-            break
-
-        small_frame = cv2.resize(frame, (0, 0), fx=0.5, fy=0.5)
+    print("Attendance session started...")
 
-        if time.time() - last_check_time >= CHECK_INTERVAL:
+    # -------- PIPELINE STAGES --------
+    # capture thread → latest frame → inference worker → live_updates queue → writer
+    # The main loop below only draws the newest frame with the latest boxes
+    # (or just waits, when headless).
+    stop_event = Event()
+    inference_done = Event()
+    latest_frame = LatestFrame()
+    capture_stats = StageStats("capture")
+    inference_stats = StageStats("inference")
+    writer_stats = StageStats("writer")
+    display_stats = StageStats("display")
+    live_updates = DropOldestQueue(WRITE_QUEUE_SIZE, writer_stats)
+    overlay = []
+
+    def inference_worker():
+        nonlocal total_checks, overlay, observed_time, identified
+        seq = 0
+        next_check = time.time()
+        last_offset = None
+        last_error_log = None
+        unlogged_errors = 0
+
+        while not stop_event.is_set():
+            # Sleep until the next check, then take the newest frame
+            delay = next_check - time.time()
+            if delay > 0 and stop_event.wait(delay):
+                break
+
+            seq, frame = latest_frame.get(after=seq, timeout=1.0)
+            if frame is None:
+                continue
+
+            check_time = time.time()
+            # Each check stands for the time since the previous one
+            offset = session_clock()
+            weight = offset - last_offset if last_offset is not None else sampler.interval / replay_scale
+            last_offset = offset
             total_checks += 1
-            last_check_time = time.time()
+            started = time.perf_counter()
 
             try:
-                faces = DeepFace.represent(
-                    img_path=small_frame,
-                    model_name=MODEL_NAME,
-                    detector_backend=DETECTOR,
-                    enforce_detection=False,
-                    align=True
-                )
+                faces = detect_faces(frame)
+                tracks, stale = tracker.update([face["box"] for face in faces],
+                                               [face["confidence"] for face in faces])
+
+                # Only new, uncertain or due-for-refresh faces go through ArcFace
+                if stale:
+                    live_embeddings = embed_faces([faces[i] for i in stale])
+                    matches, distances = matcher.match(live_embeddings, THRESHOLD)
+
+                    # Faces unknown to the class: look them up campus-wide and add them as guests
+                    unknown = [k for k, m in enumerate(matches) if m < 0]
+                    if campus_matcher is not None and unknown:
+                        campus_matches, campus_distances = campus_matcher.match(
+                            [live_embeddings[k] for k in unknown], THRESHOLD)
+                        for k, m, distance in zip(unknown, campus_matches, campus_distances):
+                            if m < 0:
+                                continue
+                            guest = campus_faces[m]
+                            if guest["id"] not in known_index:
+                                known_index[guest["id"]] = len(known_faces)
+                                known_faces.append(dict(guest))
+                                students[guest["id"]] = guest["name"]
+                                timelines[guest["id"]] = PresenceTimeline()
+                                first_seen_time[guest["id"]] = None
+                                last_seen_time[guest["id"]] = None
+                            matches[k] = known_index[guest["id"]]
+                            distances[k] = distance
+
+                    for i, match, distance in zip(stale, matches, distances):
+                        tracker.assign(tracks[i], match, distance)
 
                 seen = set()
+                boxes = []
 
-                for face in faces:
-                    live_embedding = face["embedding"]
+                for face, track in zip(faces, tracks):
                     best_match = "Unknown"
-                    min_dist = 1.0
-
-                    for person in known_faces:
-                        dist = get_distance(person["embedding"], live_embedding)
-                        if dist < min_dist and dist <= THRESHOLD:
-                            min_dist = dist
-                            best_match = person["name"]
+                    if track.match >= 0:
+                        person = known_faces[track.match]
+                        best_match = person["name"]
 
                     # Attendance timing logic
                     if best_match != "Unknown":
-                        seen.add(best_match)
-                        now_dt = datetime.now()
-                        if first_seen_time[best_match] is None:
-                            first_seen_time[best_match] = now_dt
-                        last_seen_time[best_match] = now_dt
-
-                        # Update database with live attendance
-                        # Check if student already exists in DB
-                        cursor.execute("SELECT face_entry FROM live_attendance WHERE student_id = ?", (person["id"],))
-                        row = cursor.fetchone()
-
-                        entry = first_seen_time[best_match].strftime("%H:%M:%S")
-                        exit_time = last_seen_time[best_match].strftime("%H:%M:%S")
-                        duration = round((last_seen_time[best_match] - first_seen_time[best_match]).total_seconds()/60, 2)
-
-                        if row is None:
-                            # First time seeing this student → INSERT
-                            cursor.execute("""
-                                INSERT INTO live_attendance (student_id, name, face_entry, face_exit, duration, status)
-                                VALUES (?, ?, ?, ?, ?, ?)
-                            """, (person["id"], best_match, entry, exit_time, duration, "Present"))
-                        else:
-                            # Already exists → UPDATE only exit time + duration
-                            cursor.execute("""
-                                UPDATE live_attendance
-                                SET face_exit = ?, duration = ?, status = ?
-                                WHERE student_id = ?
-                            """, (exit_time, duration, "Present", person["id"]))
-
-                        conn.commit()
-
-
-                    # -------- DRAW FACE BOX --------
-                    area = face["facial_area"]
-                    x, y, w, h = [v * 2 for v in [area['x'], area['y'], area['w'], area['h']]]
-
-                    color = (0, 255, 0) if best_match != "Unknown" else (0, 0, 255)
-
-                    cv2.rectangle(frame, (x, y), (x+w, y+h), color, 2)
-                    cv2.putText(frame, best_match, (x, y-10),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
-
-                for name in seen:
-                    presence_counter[name] += 1
-
-            except:
-                pass
-
-        cv2.imshow("Face Attendance System", frame)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+                        sid = person["id"]
+                        if sid not in seen:
+                            seen.add(sid)
+                            timelines[sid].mark(offset - weight, offset)
+                        now_dt = datetime.fromtimestamp(start_time + offset)
+                        if first_seen_time[sid] is None:
+                            first_seen_time[sid] = now_dt
+                            if expected and track.match < expected:
+                                identified += 1
+                        last_seen_time[sid] = now_dt
+
+                        # Hand the live attendance row to the writer stage
+                        entry = first_seen_time[sid].strftime("%H:%M:%S")
+                        exit_time = last_seen_time[sid].strftime("%H:%M:%S")
+                        duration = timelines[sid].minutes()
+                        live_updates.put((sid, best_match, entry, exit_time, duration, "Present"))
+
+                    # Face box for the display loop
+                    if not headless:
+                        boxes.append((face["box"], best_match))
+
+                observed_time += weight
+
+                overlay = boxes
+
+            except Exception as e:
+                # Counted, and visible to the worker's status command
+                inference_stats.fail()
+                session_state["failed_checks"] = inference_stats.failed
+                if last_error_log is None or check_time - last_error_log >= ERROR_LOG_INTERVAL:
+                    if last_error_log is None:
+                        traceback.print_exc()
+                    more = f" (+{unlogged_errors} since last report)" if unlogged_errors else ""
+                    print(f"[!] Check failed: {type(e).__name__}: {e}{more}")
+                    last_error_log = check_time
+                    unlogged_errors = 0
+                else:
+                    unlogged_errors += 1
+
+            latency = time.perf_counter() - started
+            inference_stats.tick(busy=latency)
+            session_state["state"] = "running"
+            next_check = check_time + sampler.update(latency, identified, expected)
+
+        inference_done.set()
+
+    def writer_worker():
+        # Own connection: SQLite connections stay on the thread that made them
+        conn = database.connect()
+        cursor = conn.cursor()
+
+        while True:
+            finished = inference_done.wait(LIVE_FLUSH_INTERVAL)
+
+            # Keep only the newest row per student, then one UPSERT batch per flush
+            pending = {}
+            for row in live_updates.drain():
+                pending[row[0]] = row
+
+            if pending:
+                started = time.perf_counter()
+                with conn:
+                    cursor.executemany("""
+                        INSERT INTO live_attendance (student_id, name, face_entry, face_exit, duration, status)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(student_id) DO UPDATE SET
+                            face_exit = excluded.face_exit,
+                            duration = excluded.duration,
+                            status = excluded.status
+                    """, list(pending.values()))
+                writer_stats.tick(len(pending), busy=time.perf_counter() - started)
+
+            if finished:
+                break
+
+        conn.close()
+
+    capture = CaptureThread(cap, latest_frame, stop_event, capture_stats)
+    inference = Thread(target=inference_worker, name="inference", daemon=True)
+    writer = Thread(target=writer_worker, name="writer", daemon=True)
+    for worker in (capture, inference, writer):
+        worker.start()
+
+    # -------- MAIN / DISPLAY LOOP --------
+    seq = 0
+    last_stats_time = time.time()
+
+    # Ctrl-C (the only way to end a headless session early) still runs the
+    # shutdown below, so the writer finishes its flush and the session is saved
+    try:
+        while running and not stop_event.is_set():
+            # Stop after class duration
+            if session_clock() / 60 >= CLASS_DURATION_MIN:
+                break
+
+            if time.time() - last_stats_time >= STATS_INTERVAL:
+                last_stats_time = time.time()
+                for stats in (capture_stats, inference_stats, writer_stats, display_stats):
+                    print(f"[pipeline] {stats.summary()}")
+                print(f"[pipeline] {tracker.summary()}")
+                print(f"[pipeline] {sampler.summary()}")
+
+            # Headless: nothing to draw, the worker threads do all the work
+            if headless:
+                stop_event.wait(1.0)
+                continue
+
+            seq, frame = latest_frame.get(after=seq, timeout=1.0)
+            if frame is None:
+                continue
+
+            # Draw on a copy: the inference worker may be reading the same frame
+            frame = frame.copy()
+            for (x, y, w, h), best_match in overlay:
+                color = (0, 255, 0) if best_match != "Unknown" else (0, 0, 255)
+                cv2.rectangle(frame, (x, y), (x+w, y+h), color, 2)
+                cv2.putText(frame, best_match, (x, y-10),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
+
+            cv2.imshow("Face Attendance System", frame)
+            display_stats.tick()
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+    except KeyboardInterrupt:
+        print("Session stopped by user - saving...")
+
+    stop_event.set()
+    capture.join()
+    inference.join()
+    writer.join()
 
     cap.release()
-    cv2.destroyAllWindows()
+    if not headless:
+        cv2.destroyAllWindows()
     running = False
 
-    generate_report(known_faces, presence_counter, first_seen_time,
-                    last_seen_time, total_checks,
-                    REQUIRED_PRESENT_MIN, CLASS_DURATION_MIN,
-                    EXCEL_FILE)
+    for stats in (capture_stats, inference_stats, writer_stats, display_stats):
+        print(f"[pipeline] {stats.summary()}")
+    print(f"[pipeline] {tracker.summary()}")
+    print(f"[pipeline] {sampler.summary()}")
 
-# -------- REPORT GENERATION --------
-def generate_report(known_faces, presence_counter, first_seen_time,
-                    last_seen_time, total_checks,
-                    REQUIRED_PRESENT_MIN, CLASS_DURATION_MIN,
-                    EXCEL_FILE):
+    session_state["state"] = "saving"
 
-    required_ratio = REQUIRED_PRESENT_MIN / CLASS_DURATION_MIN
-    wb = openpyxl.Workbook()
-    ws = wb.active
+    # One result for the whole session: the report and the database both read it
+    result = SessionResult(subject_id, class_id, datetime.fromtimestamp(start_time), observed_time,
+                           total_checks, REQUIRED_PRESENT_MIN / CLASS_DURATION_MIN)
+    for sid, name in students.items():
+        result.add(sid, name, timelines[sid], first_seen_time[sid], last_seen_time[sid])
 
-    ws.append(["Student Name","Student ID","Face Entry",
-               "Face Exit","Duration (Minutes)","Status"])
+    generate_report(result, EXCEL_FILE)
+    session_state["state"] = "finished"
 
-    for person in known_faces:
-        name = person["name"]
-        sid = person["id"]
-        ratio = presence_counter[name] / total_checks if total_checks else 0
+# -------- REPORT GENERATION --------
+def generate_report(result, EXCEL_FILE):
+    """Write the session's Excel report, then save it to the database if it has a subject"""
+    started = time.perf_counter()
 
-        entry = first_seen_time[name]
-        exit = last_seen_time[name]
+    if result.observed_seconds:
+        print(f"Sampling: {result.checks} checks over {result.observed_seconds / 60:.1f} min "
+              f"(effective {result.checks / result.observed_seconds * 60:.1f} checks/min)")
 
-        entry_str = entry.strftime("%H:%M:%S") if entry else "-"
-        exit_str = exit.strftime("%H:%M:%S") if exit else "-"
-        duration = round((exit-entry).total_seconds()/60,2) if entry and exit else 0
+    # Write-only workbook: rows stream out instead of building a cell grid in memory
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Attendance")
 
-        status = "Present" if ratio >= required_ratio else "Absent"
+    ws.append(["Student Name","Student ID","Face Entry",
+               "Face Exit","Duration (Minutes)","Status"])
 
-    ws.append([name, sid, entry_str, exit_str, duration, status])
+    for student in result.students:
+        entry_str = student.entry.strftime("%H:%M:%S") if student.entry else "-"
+        exit_str = student.exit.strftime("%H:%M:%S") if student.exit else "-"
+        ws.append([student.name, student.student_id, entry_str, exit_str, student.duration, student.status])
 
     wb.save(EXCEL_FILE)
-    print(f"Attendance saved to {EXCEL_FILE}")
+    print(f"Attendance saved to {EXCEL_FILE} ({len(result.students)} students, "
+          f"{result.present_count()} present, {(time.perf_counter() - started) * 1000:.0f} ms)")
     
     # -------- SAVE TO DATABASE WITH SUBJECT --------
-    if SUBJECT_ID:
-        save_attendance_to_db(known_faces, presence_counter, total_checks, required_ratio)
+    if result.subject_id:
+        save_attendance_to_db(result)
 
-def save_attendance_to_db(known_faces, presence_counter, total_checks, required_ratio):
-    """Save face duration data to database for merging with RFID"""
-    import subprocess
+def save_attendance_to_db(result):
+    """Save face durations and presence timelines to database for merging with RFID"""
+    started = time.perf_counter()
     
-    conn = sqlite3.connect("database.db")
+    conn = database.connect()
+    database.migrate(conn)
     cursor = conn.cursor()
     
-    today = datetime.now().strftime("%Y-%m-%d")
-    
     print("[DB] Saving face duration data...")
     
-    for person in known_faces:
-        name = person["name"]
-        sid = person["id"]
-        
-        # Calculate duration from first/last seen times
-        entry = person.get("first_seen")
-        exit_time = person.get("last_seen")
-        
-        if entry and exit_time:
-            duration = round((exit_time - entry).total_seconds() / 60, 2)
-        else:
-            # Fallback: use presence ratio to estimate duration
-            ratio = presence_counter.get(name, 0) / total_checks if total_checks else 0
-            duration = round(ratio * 60, 2)  # Estimate based on 60 min class
-        
-        # Save to face_logs for merging with RFID data
-        cursor.execute("""
+    subject_id = result.subject_id
+    session_start = result.started.strftime("%H:%M:%S")
+    face_rows = []
+    timeline_rows = []
+    for student in result.students:
+        face_rows.append((student.student_id, subject_id, student.duration, result.date))
+        # Timelines for the dashboard, one row per student per session
+        timeline_rows.append((student.student_id, subject_id, result.date, session_start,
+                              student.timeline.to_json(), round(student.timeline.total, 1),
+                              round(result.observed_seconds, 1)))
+    
+    # Save to face_logs for merging with RFID data, timelines in the same transaction
+    with conn:
+        cursor.executemany("""
             INSERT INTO face_logs (student_id, subject_id, duration, date)
             VALUES (?, ?, ?, ?)
-        """, (sid, SUBJECT_ID, duration, today))
-        
-        print(f"  → {name}: {duration:.1f} min recorded")
-    
-    conn.commit()
+        """, face_rows)
+        cursor.executemany("""
+            INSERT INTO presence_timeline (student_id, subject_id, date, session_start,
+                                           intervals, present_seconds, observed_seconds)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(student_id, subject_id, date, session_start) DO UPDATE SET
+                intervals = excluded.intervals,
+                present_seconds = excluded.present_seconds,
+                observed_seconds = excluded.observed_seconds
+        """, timeline_rows)
     conn.close()
     
-    print(f"[DB] Face data saved for Subject ID: {SUBJECT_ID}")
+    saved = time.perf_counter()
+    print(f"[DB] Face data saved for Subject ID: {subject_id}, {len(face_rows)} students "
+          f"({(saved - started) * 1000:.0f} ms)")
     print("[DB] Calling finalize_attendance...")
     
-    # Call finalize_attendance to merge RFID + Face data
+    # Merge RFID + Face data in-process, for this session's subject only
     try:
-        script_path = os.path.join(os.path.dirname(__file__), "finalize_attendance.py")
-        subprocess.run(["python", script_path], cwd=os.path.dirname(script_path))
+        finalize_attendance(subject_id)
+        print(f"[DB] Finalized in {(time.perf_counter() - saved) * 1000:.0f} ms")
     except Exception as e:
         print(f"[!] Error finalizing attendance: {e}")
 
-# -------- GUI --------
-def start_attendance():
-    global running
-    if not running:
+# -------- GUI (OPTIONAL FRONT-END) --------
+def run_gui(subject_id, class_id, camera_source, duration_min, replay_speed):
+    import tkinter as tk
+
+    def start_attendance():
+        global running
+        if not running:
+            running = True
+            Thread(target=run_attendance, args=(subject_id, class_id, camera_source),
+                   kwargs={"duration_min": duration_min, "replay_speed": replay_speed}).start()
+
+    def stop_program():
+        global running
+        running = False
+
+    root = tk.Tk()
+    root.title("Face Attendance Dashboard")
+    root.geometry("400x250")
+
+    tk.Label(root, text="AI Face Attendance System", font=("Arial",16)).pack(pady=20)
+    tk.Button(root, text="Start Attendance", command=start_attendance).pack(pady=10)
+    tk.Button(root, text="Stop", command=stop_program).pack(pady=10)
+
+    root.mainloop()
+
+def main():
+    global INFERENCE_BACKEND, running
+
+    parser = argparse.ArgumentParser(description="AI face attendance engine")
+    parser.add_argument("--subject", type=int, default=None, help="subject_id to record attendance for")
+    parser.add_argument("--class-id", type=int, default=None, help="load only this class's faces")
+    parser.add_argument("--camera", default="0", help="camera index, stream URL, video file or image folder")
+    parser.add_argument("--duration", type=float, default=None, help="session length in minutes (default 60)")
+    parser.add_argument("--replay", type=float, default=1.0,
+                        help="playback speed for video files / image folders (1 = real time)")
+    parser.add_argument("--backend", choices=["deepface", "onnx"], default=INFERENCE_BACKEND,
+                        help="inference backend (onnx needs models/arcface.onnx, see onnx_backend.py)")
+    parser.add_argument("--headless", action="store_true",
+                        help="no Tk dashboard, preview window or box drawing; start immediately")
+    args = parser.parse_args()
+
+    camera_source = parse_camera_source(args.camera)
+    INFERENCE_BACKEND = args.backend
+
+    if args.headless:
         running = True
-        Thread(target=run_attendance).start()
-
-def stop_program():
-    global running
-    running = False
-
-root = tk.Tk()
-root.title("Face Attendance Dashboard")
-root.geometry("400x250")
-
-tk.Label(root, text="AI Face Attendance System", font=("Arial",16)).pack(pady=20)
-tk.Button(root, text="Start Attendance", command=start_attendance).pack(pady=10)
-tk.Button(root, text="Stop", command=stop_program).pack(pady=10)
-
-root.mainloop()
\ No newline at end of file
+        try:
+            run_attendance(args.subject, args.class_id, camera_source,
+                           headless=True, duration_min=args.duration, replay_speed=args.replay)
+        except KeyboardInterrupt:
+            running = False
+    else:
+        run_gui(args.subject, args.class_id, camera_source, args.duration, args.replay)
+
+if __name__ == "__main__":
+    main()
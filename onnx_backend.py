@@ -0,0 +1,213 @@
+"""
+ONNX BACKEND - Smart Attendance System
+======================================
+Face detection and ArcFace without TensorFlow, for CPU-only classroom PCs:
+
+    detector   YuNet, run by OpenCV (cv2.FaceDetectorYN)
+    embedder   ArcFace exported to ONNX, run by ONNX Runtime on the CPU
+
+Enable it with INFERENCE_BACKEND = "onnx" in live_recognition.py (or
+--backend onnx). Recognition then never imports DeepFace or TensorFlow.
+
+One-time setup, on any machine that has DeepFace and tf2onnx:
+    python onnx_backend.py export      # models/arcface.onnx
+    python onnx_backend.py quantize    # models/arcface_int8.onnx (optional, QUANTIZED = True)
+    python onnx_backend.py parity      # compare with DeepFace ArcFace on id_database/
+
+The YuNet weights are read from models/ or from DeepFace's weights folder
+(~/.deepface/weights), where DeepFace downloads them on first use.
+
+Needs: pip install onnxruntime   (export also needs tf2onnx)
+"""
+
+import argparse
+import os
+
+import cv2
+import numpy as np
+
+# Configuration
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+ARCFACE_ONNX = os.path.join(MODEL_DIR, "arcface.onnx")
+ARCFACE_INT8 = os.path.join(MODEL_DIR, "arcface_int8.onnx")
+YUNET_FILE = "face_detection_yunet_2023mar.onnx"
+
+# Use the int8 model from `quantize` instead of float32
+QUANTIZED = False
+# ONNX Runtime intra-op threads (0 = the worker's slice from OMP_NUM_THREADS,
+# set by auto_scheduler.py, or else one per physical core)
+THREADS = 0
+# Same default YuNet score threshold as DeepFace
+SCORE_THRESHOLD = 0.9
+
+def cache_name():
+    """Embedding cache name, so ONNX and DeepFace galleries never mix"""
+    return "ArcFace-onnx-int8" if QUANTIZED else "ArcFace-onnx"
+
+def thread_count():
+    """THREADS, or the per-worker CPU slice in OMP_NUM_THREADS; 0 lets the runtime decide"""
+    if THREADS:
+        return THREADS
+    try:
+        return max(0, int(os.environ.get("OMP_NUM_THREADS", 0)))
+    except ValueError:
+        return 0
+
+def find_yunet():
+    home = os.environ.get("DEEPFACE_HOME", os.path.expanduser("~"))
+    for path in (os.path.join(MODEL_DIR, YUNET_FILE), os.path.join(home, ".deepface", "weights", YUNET_FILE)):
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"{YUNET_FILE} not found in {MODEL_DIR} or the DeepFace weights folder")
+
+# -------- DETECTOR --------
+class YuNetDetector:
+    """YuNet through OpenCV, returning faces in DeepFace.extract_faces format"""
+
+    def __init__(self, model_path=None, score_threshold=SCORE_THRESHOLD, nms_threshold=0.3, top_k=5000):
+        # OpenCV's DNN has its own thread pool, separate from ONNX Runtime's
+        if thread_count():
+            cv2.setNumThreads(thread_count())
+        self.detector = cv2.FaceDetectorYN.create(model_path or find_yunet(), "", (0, 0),
+                                                  score_threshold, nms_threshold, top_k)
+
+    def detect_faces(self, image):
+        """
+        List of {"face" (aligned crop, RGB 0-1), "facial_area", "confidence"}
+        for every face in a BGR image.
+        """
+        height, width = image.shape[:2]
+        self.detector.setInputSize((width, height))
+        _, rows = self.detector.detect(image)
+        if rows is None:
+            return []
+
+        faces = []
+        for row in rows:
+            x, y, w, h = (int(v) for v in row[:4])
+            crop = align_face(image, row)
+            faces.append({
+                "face": crop[:, :, ::-1].astype(np.float32) / 255,
+                "facial_area": {"x": x, "y": y, "w": w, "h": h},
+                "confidence": float(row[14]),
+            })
+        return faces
+
+def align_face(image, row):
+    """Crop a YuNet box, rotated so the eyes are level (like DeepFace's align=True)"""
+    x, y, w, h = row[:4]
+    right_x, right_y, left_x, left_y = row[4:8]
+    angle = np.degrees(np.arctan2(left_y - right_y, left_x - right_x))
+
+    # Rotate about the box centre, then shift the box to the output origin
+    matrix = cv2.getRotationMatrix2D((float(x + w / 2), float(y + h / 2)), float(angle), 1.0)
+    matrix[0, 2] -= x
+    matrix[1, 2] -= y
+    return cv2.warpAffine(image, matrix, (max(1, int(w)), max(1, int(h))))
+
+# -------- EMBEDDER --------
+class ArcFaceOnnx:
+    """ArcFace ONNX session with a fixed thread budget"""
+
+    def __init__(self, model_path=None, threads=None):
+        import onnxruntime as ort
+
+        if threads is None:
+            threads = thread_count()
+        model_path = model_path or (ARCFACE_INT8 if QUANTIZED else ARCFACE_ONNX)
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.input_shape = tuple(model_input.shape[1:3])
+
+    def embed(self, batch):
+        """(n, height, width, 3) float32 BGR 0-1 → (n, 512) embeddings"""
+        return self.session.run(None, {self.input_name: batch})[0]
+
+# -------- SETUP COMMANDS --------
+def export_arcface(path=ARCFACE_ONNX):
+    """Convert DeepFace's ArcFace Keras model to ONNX (needs tf2onnx)"""
+    import tensorflow as tf
+    import tf2onnx
+    from deepface import DeepFace
+
+    model = DeepFace.build_model("ArcFace")
+    height, width = model.input_shape
+    spec = (tf.TensorSpec((None, height, width, 3), tf.float32, name="input"),)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tf2onnx.convert.from_keras(model.model, input_signature=spec, opset=13, output_path=path)
+    print(f"Exported {path}")
+
+def quantize_arcface(source=ARCFACE_ONNX, target=ARCFACE_INT8):
+    """Dynamic int8 quantization of the weights (smaller, faster on CPU)"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(source, target, weight_type=QuantType.QInt8)
+    print(f"Quantized {target}")
+
+def parity(db_dir, quantized):
+    """
+    Compare ONNX ArcFace with DeepFace ArcFace on the enrollment photos:
+
+        same crops      cosine distance between the two models' embeddings
+        end to end      ONNX detection + embedding matched against the
+                        DeepFace gallery; does each photo find itself?
+    """
+    # Run as a script this module is __main__; live_recognition reads the
+    # flag from the imported onnx_backend module, so set it there
+    import live_recognition
+    import onnx_backend
+    from deepface import DeepFace
+    from face_gallery import IMAGE_EXTENSIONS, load_gallery
+    from face_matcher import create_matcher
+
+    onnx_backend.QUANTIZED = quantized
+    files = sorted(f for f in os.listdir(db_dir) if f.lower().endswith(IMAGE_EXTENSIONS))
+    embedder = onnx_backend.ArcFaceOnnx()
+
+    distances = []
+    for filename in files:
+        faces = DeepFace.extract_faces(img_path=os.path.join(db_dir, filename),
+                                       detector_backend="opencv", enforce_detection=False, align=True)
+        live_recognition.INFERENCE_BACKEND = "deepface"
+        reference = np.asarray(live_recognition.embed_faces(faces[:1]), dtype=np.float32)
+        batch = np.stack([live_recognition.prepare_crop(faces[0]["face"], embedder.input_shape)])
+        candidate = embedder.embed(batch)
+        reference /= np.linalg.norm(reference, axis=1, keepdims=True)
+        candidate /= np.linalg.norm(candidate, axis=1, keepdims=True)
+        distances.append(float(1 - np.sum(reference * candidate)))
+
+    known_faces, embeddings = load_gallery("ArcFace", db_dir=db_dir)
+    live_recognition.INFERENCE_BACKEND = "onnx"
+    _, onnx_embeddings = load_gallery(db_dir=db_dir, **live_recognition.gallery_options())
+    matches, _ = create_matcher(embeddings).match(onnx_embeddings, threshold=2.0)
+    agree = sum(1 for i, m in enumerate(matches) if m == i)
+
+    distances = np.asarray(distances)
+    print("")
+    print(f"model             {'int8' if quantized else 'float32'} ONNX vs DeepFace ArcFace, {len(files)} photos")
+    print(f"same crops        cosine distance mean {distances.mean():.4f}, max {distances.max():.4f}")
+    print(f"end to end        {agree}/{len(known_faces)} photos matched their own DeepFace embedding")
+
+def main():
+    parser = argparse.ArgumentParser(description="ONNX Runtime face recognition backend")
+    parser.add_argument("command", choices=["export", "quantize", "parity"])
+    parser.add_argument("--db", default="id_database", help="enrollment photos for parity")
+    parser.add_argument("--quantized", action="store_true", help="check the int8 model")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_arcface()
+    elif args.command == "quantize":
+        quantize_arcface()
+    else:
+        parity(args.db, args.quantized)
+
+if __name__ == "__main__":
+    main()
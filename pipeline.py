@@ -0,0 +1,235 @@
+"""
+PIPELINE - Smart Attendance System
+==================================
+Building blocks for the staged recognition pipeline:
+
+    capture thread  →  LatestFrame  →  inference worker  →  DropOldestQueue  →  writer
+
+The capture thread keeps reading the camera so its buffer never lags,
+and only the newest frame is kept. Stages are connected with bounded
+queues that drop the oldest item when full, so a slow stage never
+blocks the one before it. Every stage keeps a StageStats counter.
+
+AdaptiveInterval sets how often the inference worker samples a frame.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from queue import Empty
+
+# Optional: system-wide CPU load where the OS has no load average (Windows)
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+class StageStats:
+    """Throughput counter for one pipeline stage"""
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.dropped = 0
+        self.failed = 0
+        self.busy = 0.0
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def tick(self, n=1, busy=0.0):
+        with self._lock:
+            self.count += n
+            self.busy += busy
+
+    def drop(self, n=1):
+        with self._lock:
+            self.dropped += n
+
+    def fail(self, n=1):
+        with self._lock:
+            self.failed += n
+
+    def rate(self):
+        elapsed = time.perf_counter() - self.started
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+    def summary(self):
+        line = f"{self.name}: {self.count} items, {self.rate():.2f}/s"
+        if self.count and self.busy:
+            line += f", {self.busy / self.count * 1000:.0f} ms avg"
+        if self.dropped:
+            line += f", {self.dropped} dropped"
+        if self.failed:
+            line += f", {self.failed} failed"
+        return line
+
+class LatestFrame:
+    """
+    Single-slot holder: the writer replaces the frame, readers get the newest.
+
+    Frames carry an increasing sequence number so a reader can wait for a
+    frame newer than the last one it saw, and count how many it skipped.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._frame = None
+        self._seq = 0
+
+    def put(self, frame):
+        with self._cond:
+            self._frame = frame
+            self._seq += 1
+            self._cond.notify_all()
+
+    def get(self, after=0, timeout=None):
+        """Return (seq, frame) newer than seq `after`, or (after, None) on timeout"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > after, timeout):
+                return after, None
+            return self._seq, self._frame
+
+class DropOldestQueue:
+    """Bounded FIFO that discards its oldest item instead of blocking producers"""
+
+    def __init__(self, maxsize, stats=None):
+        self._items = deque()
+        self._cond = threading.Condition()
+        self.maxsize = maxsize
+        self.stats = stats
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                if self.stats is not None:
+                    self.stats.drop()
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items, timeout):
+                raise Empty
+            return self._items.popleft()
+
+    def drain(self):
+        """Remove and return everything currently queued"""
+        with self._cond:
+            items = list(self._items)
+            self._items.clear()
+            return items
+
+class CaptureThread(threading.Thread):
+    """Reads frames as fast as the source delivers them into a LatestFrame"""
+
+    def __init__(self, cap, latest, stop_event, stats):
+        super().__init__(daemon=True, name="capture")
+        self.cap = cap
+        self.latest = latest
+        self.stop_event = stop_event
+        self.stats = stats
+
+    def run(self):
+        while not self.stop_event.is_set():
+            ret, frame = self.cap.read()
+            if not ret:
+                self.stop_event.set()
+                break
+            self.latest.put(frame)
+            self.stats.tick()
+
+class AdaptiveInterval:
+    """
+    Seconds between inference checks, adapted to the machine and the class.
+
+    The interval starts at min_interval while students are still arriving
+    (roster incomplete), relaxes to max_interval once everyone expected has
+    been identified, and never drops below the measured inference latency
+    divided by max_busy, so inference uses at most that share of the time.
+    When the CPU load per core exceeds load_limit, the interval is
+    stretched in proportion. scale multiplies everything (replay speed).
+
+    CPU load is the 1-minute load average where the OS has one, else
+    psutil's system-wide CPU percent, else this process's CPU time over
+    the wall time since the previous check.
+    """
+
+    def __init__(self, min_interval=0.5, max_interval=5.0, max_busy=0.5, load_limit=0.8,
+                 smoothing=0.3, scale=1.0):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_busy = max_busy
+        self.load_limit = load_limit
+        self.smoothing = smoothing
+        self.scale = scale
+
+        self.latency = None
+        self.interval = min_interval * scale
+        self.count = 0
+        self.total = 0.0
+        self.load_source = None
+        self._cpu_sample = None
+
+    def cpu_load(self):
+        """CPU busy share per core (1.0 = every core busy), or None before the first sample"""
+        cores = os.cpu_count() or 1
+        if hasattr(os, "getloadavg"):
+            try:
+                self._note_source("load average")
+                return os.getloadavg()[0] / cores
+            except OSError:
+                pass
+        if psutil is not None:
+            self._note_source("psutil")
+            return psutil.cpu_percent(interval=None) / 100
+
+        self._note_source("process CPU time")
+        now, cpu = time.perf_counter(), time.process_time()
+        last, self._cpu_sample = self._cpu_sample, (now, cpu)
+        if last is None or now <= last[0]:
+            return None
+        return (cpu - last[1]) / ((now - last[0]) * cores)
+
+    def _note_source(self, source):
+        if source != self.load_source:
+            self.load_source = source
+            if source == "process CPU time":
+                print("[pipeline] No load average or psutil: CPU load is this process's CPU time only "
+                      "(pip install psutil for system-wide load)")
+
+    def update(self, latency, identified=0, expected=None):
+        """Record one check's latency and return the interval until the next"""
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += self.smoothing * (latency - self.latency)
+
+        if expected and identified >= expected:
+            interval = self.max_interval
+        elif expected:
+            # Linear from min_interval (nobody yet) towards max_interval (almost everyone)
+            interval = self.min_interval + (self.max_interval - self.min_interval) * identified / expected / 2
+        else:
+            interval = self.min_interval
+
+        load = self.cpu_load()
+        if load is not None and load > self.load_limit:
+            interval *= load / self.load_limit
+
+        interval = min(max(interval, self.min_interval), self.max_interval)
+        interval = max(interval * self.scale, self.latency / self.max_busy)
+
+        self.interval = interval
+        self.count += 1
+        self.total += interval
+        return interval
+
+    def summary(self):
+        if not self.count:
+            return "sampling: no checks"
+        mean = self.total / self.count
+        return (f"sampling: interval {self.interval:.2f}s now, {mean:.2f}s avg "
+                f"({1 / mean:.2f} checks/s), latency {self.latency * 1000:.0f} ms, "
+                f"cpu load from {self.load_source or 'nothing'}")
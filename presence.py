@@ -0,0 +1,110 @@
+"""
+PRESENCE - Smart Attendance System
+==================================
+Per-student presence timeline for one class session.
+
+Each check covers the time since the previous check. When a student is
+seen, that span is added to their timeline; spans that touch are merged,
+so the timeline stays a short run-length list of intervals:
+
+    [[0.0, 312.5], [340.1, 3588.0]]     seconds since the session started
+
+Present time is kept as a running total, so duration and presence ratio
+cost nothing per check and O(intervals) to rebuild. Gaps (a student who
+left for 20 minutes) are visible without the raw detections. Timelines
+are saved to the presence_timeline table at the end of the session.
+
+SessionResult gathers every student's timeline, entry/exit and status
+once at the end of a session; the Excel report and the database save
+both read it.
+"""
+
+import json
+
+class PresenceTimeline:
+    """Merged [start, end] intervals (seconds from session start) a student was seen"""
+
+    def __init__(self, intervals=None):
+        self.intervals = [list(span) for span in intervals or []]
+        self.total = sum(end - start for start, end in self.intervals)
+
+    def mark(self, start, end):
+        """Record presence over [start, end], merging with the last interval if they touch"""
+        start = max(0.0, start)
+        if end <= start:
+            return
+        if self.intervals and start <= self.intervals[-1][1]:
+            last = self.intervals[-1]
+            if end > last[1]:
+                self.total += end - last[1]
+                last[1] = end
+            return
+        self.intervals.append([start, end])
+        self.total += end - start
+
+    @property
+    def first_seen(self):
+        return self.intervals[0][0] if self.intervals else None
+
+    @property
+    def last_seen(self):
+        return self.intervals[-1][1] if self.intervals else None
+
+    def minutes(self):
+        return round(self.total / 60, 2)
+
+    def ratio(self, observed):
+        """Share of the observed session time the student was present"""
+        return self.total / observed if observed else 0.0
+
+    def to_json(self):
+        return json.dumps([[round(start, 1), round(end, 1)] for start, end in self.intervals])
+
+    @classmethod
+    def from_json(cls, text):
+        return cls(json.loads(text) if text else [])
+
+# -------- SESSION RESULT --------
+class StudentResult:
+    """One student's outcome of a session"""
+
+    def __init__(self, student_id, name, timeline, entry, exit, ratio, status):
+        self.student_id = student_id
+        self.name = name
+        self.timeline = timeline
+        self.entry = entry
+        self.exit = exit
+        self.ratio = ratio
+        self.status = status
+
+    @property
+    def duration(self):
+        """Minutes actually seen"""
+        return self.timeline.minutes()
+
+class SessionResult:
+    """
+    Outcome of one session, built once by run_attendance() and read by both
+    the Excel report and the database save.
+    """
+
+    def __init__(self, subject_id, class_id, started, observed_seconds, checks, required_ratio):
+        self.subject_id = subject_id
+        self.class_id = class_id
+        self.started = started
+        self.observed_seconds = observed_seconds
+        self.checks = checks
+        self.required_ratio = required_ratio
+        self.students = []
+
+    def add(self, student_id, name, timeline, entry=None, exit=None):
+        ratio = timeline.ratio(self.observed_seconds)
+        status = "Present" if ratio >= self.required_ratio else "Absent"
+        self.students.append(StudentResult(student_id, name, timeline, entry, exit, ratio, status))
+
+    @property
+    def date(self):
+        return self.started.strftime("%Y-%m-%d")
+
+    def present_count(self):
+        return sum(1 for student in self.students if student.status == "Present")
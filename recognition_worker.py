@@ -0,0 +1,176 @@
+"""
+RECOGNITION WORKER - Smart Attendance System
+============================================
+A long-lived face recognition process that keeps TensorFlow, ArcFace and
+the YuNet detector loaded between classes.
+
+Starting live_recognition.py fresh for every class pays the imports and
+model builds (tens of seconds) at the start of each period. This worker
+pays them once, then waits for commands on a local socket:
+
+    {"cmd": "start", "slot_id": 7, "subject_id": 3, "class_id": 1, "camera": "0", "duration": 90}
+                          record for duration minutes (default 60)
+    {"cmd": "stop", "slot_id": 7}
+                          stop the session (report + finalize still run);
+                          ignored if the worker is running another slot
+    {"cmd": "status"}     current session state
+    {"cmd": "shutdown"}   stop the session and exit
+
+auto_scheduler.py starts one worker per room and sends it commands with
+WorkerClient. Commands are pickled, so the listener only accepts clients
+that know the authkey; the scheduler makes a random one per run and hands
+it to its workers in ATTENDANCE_WORKER_KEY. Can also run manually, with a
+key of your own:
+    ATTENDANCE_WORKER_KEY=$(python -c "import secrets; print(secrets.token_hex(32))") \
+        python recognition_worker.py --port 6001
+"""
+
+import argparse
+import os
+import secrets
+import time
+from datetime import datetime
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from threading import Thread
+
+# Local IPC settings (localhost only)
+HOST = "127.0.0.1"
+BASE_PORT = 6001
+# Environment variable holding the hex authkey shared with the worker
+AUTHKEY_ENV = "ATTENDANCE_WORKER_KEY"
+
+def log(message):
+    """Print with timestamp"""
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] {message}")
+
+def new_authkey():
+    """Random authkey for a set of workers, and its value for AUTHKEY_ENV"""
+    key = secrets.token_bytes(32)
+    return key, key.hex()
+
+def authkey_from_env():
+    value = os.environ.get(AUTHKEY_ENV)
+    if not value:
+        raise SystemExit(f"{AUTHKEY_ENV} is not set (auto_scheduler.py sets it for its workers)")
+    return bytes.fromhex(value)
+
+class WorkerClient:
+    """Sends one command per connection to a worker on HOST:port"""
+
+    def __init__(self, port, authkey):
+        self.port = port
+        self.authkey = authkey
+
+    def send(self, cmd, **params):
+        with Client((HOST, self.port), authkey=self.authkey) as conn:
+            conn.send({"cmd": cmd, **params})
+            return conn.recv()
+
+    def wait_ready(self, timeout):
+        """Poll until the worker answers (models loaded); False on timeout"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            try:
+                self.send("status")
+                return True
+            except (ConnectionRefusedError, OSError, EOFError):
+                time.sleep(0.5)
+        return False
+
+def serve(port, authkey, backend=None):
+    started = time.perf_counter()
+    log("Loading recognition engine...")
+
+    import live_recognition
+
+    if backend:
+        live_recognition.INFERENCE_BACKEND = backend
+    live_recognition.warm_up()
+    log(f"Models warm in {time.perf_counter() - started:.1f}s")
+
+    session = {"thread": None, "state": "idle", "params": None}
+    keys = ("slot_id", "subject_id", "class_id", "camera", "duration")
+
+    def run_session(params):
+        try:
+            live_recognition.run_attendance(params["subject_id"], params["class_id"],
+                                            live_recognition.parse_camera_source(params["camera"]),
+                                            session_state=session, headless=True,
+                                            duration_min=params["duration"])
+        except Exception as e:
+            log(f"[!] Session failed: {e}")
+            session["state"] = "failed"
+        finally:
+            live_recognition.running = False
+
+    def stop_session():
+        live_recognition.running = False
+        thread = session["thread"]
+        if thread is not None:
+            thread.join()
+            session["thread"] = None
+
+    with Listener((HOST, port), authkey=authkey) as listener:
+        log(f"Worker listening on {HOST}:{port}")
+
+        while True:
+            # A client with the wrong key must not take the worker down
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, EOFError, OSError) as e:
+                log(f"[!] Rejected connection: {e}")
+                continue
+
+            with conn:
+                msg = conn.recv()
+                cmd = msg.get("cmd")
+
+                if cmd == "start":
+                    stop_session()
+                    session["params"] = {k: msg.get(k) for k in keys}
+                    session["state"] = "loading"
+                    live_recognition.running = True
+                    session["thread"] = Thread(target=run_session, args=(session["params"],))
+                    session["thread"].start()
+                    log(f"Session started: {session['params']}")
+                    conn.send({"ok": True})
+
+                elif cmd == "stop":
+                    running_slot = (session["params"] or {}).get("slot_id")
+                    if msg.get("slot_id") is not None and msg.get("slot_id") != running_slot:
+                        log(f"Ignoring stop for slot {msg.get('slot_id')}: running slot {running_slot}")
+                        conn.send({"ok": False, "state": session["state"],
+                                   "error": f"not running slot {msg.get('slot_id')}"})
+                        continue
+                    log("Stopping session...")
+                    stop_session()
+                    conn.send({"ok": True, "state": session["state"]})
+
+                elif cmd == "status":
+                    thread = session["thread"]
+                    conn.send({"ok": True, "state": session["state"], "params": session["params"],
+                               "alive": thread is not None and thread.is_alive(),
+                               "failed_checks": session.get("failed_checks", 0)})
+
+                elif cmd == "shutdown":
+                    stop_session()
+                    conn.send({"ok": True})
+                    break
+
+                else:
+                    conn.send({"ok": False, "error": f"unknown command: {cmd}"})
+
+    log("Worker stopped")
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm face recognition worker")
+    parser.add_argument("--port", type=int, default=BASE_PORT)
+    parser.add_argument("--backend", choices=["deepface", "onnx"], default=None,
+                        help="inference backend (default: live_recognition.INFERENCE_BACKEND)")
+    args = parser.parse_args()
+    serve(args.port, authkey_from_env(), args.backend)
+
+if __name__ == "__main__":
+    main()
@@ -14,12 +14,9 @@ Requirements:
 """
 
 import keyboard
-import sqlite3
-import os
 from datetime import datetime
 
-# Database path
-DB_PATH = os.path.join(os.path.dirname(__file__), "database.db")
+import database
 
 # Buffer to accumulate key presses
 buffer = ""
@@ -35,7 +32,7 @@ def save_latest_uid(uid):
     if not uid:
         return
     
-    conn = sqlite3.connect(DB_PATH)
+    conn = database.connect()
     cursor = conn.cursor()
     
     # Clear old buffer and save new UID
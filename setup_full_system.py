@@ -1,10 +1,9 @@
 import sqlite3
-import os
 
-# Database path
-DB_PATH = os.path.join(os.path.dirname(__file__), "database.db")
+import database
 
-conn = sqlite3.connect(DB_PATH)
+# Creates database.db next to this script, in WAL mode
+conn = database.connect()
 cursor = conn.cursor()
 
 print("")
@@ -139,6 +138,12 @@ print("[OK] schedule table ready")
 
 conn.commit()
 
+# ================= SCHEMA MIGRATIONS =================
+# Indexes, change counters, classes.camera_source, ...
+# Safe to re-run on an existing database: only pending migrations are applied
+version = database.migrate(conn)
+print(f"[OK] migrations applied (schema version {version})")
+
 # ================= CREATE ADMIN ACCOUNT =================
 print("")
 print("-" * 50)